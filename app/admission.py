@@ -0,0 +1,148 @@
+"""Admission control with bounded concurrency, load shedding and request deadlines."""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Coroutine
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed because the server is at capacity."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        """Initialize the error with the number of seconds the client should wait before retrying."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request does not complete within its deadline."""
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client disconnects before its request completes."""
+
+
+class AdmissionController:
+    """Bounds the number of in-flight requests, queueing a limited number of extra requests for a limited time."""
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        retry_after_seconds: int,
+        deadline_seconds: float,
+        disconnect_poll_seconds: float = 0.5,
+    ) -> None:
+        """Initialize the admission controller.
+
+        Args:
+            max_in_flight (int): Maximum number of requests processed concurrently.
+            max_queue (int): Maximum number of requests waiting for a slot.
+            max_wait_seconds (float): Maximum time a request may wait for a slot before being shed.
+            retry_after_seconds (int): Value of the Retry-After header sent with shed requests.
+            deadline_seconds (float): Maximum time an admitted request may take.
+            disconnect_poll_seconds (float): How often to check whether the client is still connected.
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.deadline_seconds = deadline_seconds
+        self.disconnect_poll_seconds = disconnect_poll_seconds
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.disconnected = 0
+
+    def _shed(self, reason: str) -> OverloadedError:
+        """Record a shed request and build the error to raise."""
+        self.shed += 1
+        logging.warning(f"Shedding request: {reason} (in flight: {self.in_flight}, queued: {self.queued}).")
+        return OverloadedError(
+            "The server is currently overloaded. Please try again later.", retry_after=self.retry_after_seconds
+        )
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a processing slot for the duration of the context.
+
+        Raises:
+            OverloadedError: If the queue is full or no slot frees up within the maximum wait.
+        """
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            raise self._shed("queue is full")
+
+        self.queued += 1
+        try:
+            async with asyncio.timeout(self.max_wait_seconds):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            raise self._shed("timed out waiting in queue") from None
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def run(self, request: Request, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine, cancelling it if the deadline passes or the client disconnects.
+
+        Args:
+            request (Request): The incoming request, used to detect client disconnects.
+            coro (Coroutine): The work to perform for the request.
+
+        Returns:
+            The result of the coroutine.
+
+        Raises:
+            DeadlineExceededError: If the coroutine does not finish within the deadline.
+            ClientDisconnectedError: If the client disconnects before the coroutine finishes.
+        """
+        task = asyncio.create_task(coro)
+        deadline = time.monotonic() + self.deadline_seconds
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                done, _ = await asyncio.wait({task}, timeout=max(min(self.disconnect_poll_seconds, remaining), 0))
+                if done:
+                    return task.result()
+                if await request.is_disconnected():
+                    self.disconnected += 1
+                    logging.info("Client disconnected, cancelling request.")
+                    raise ClientDisconnectedError("Client disconnected before the request completed.")
+                if remaining <= 0:
+                    self.timed_out += 1
+                    logging.warning(f"Request exceeded its {self.deadline_seconds}s deadline, cancelling.")
+                    raise DeadlineExceededError("The request took too long to complete. Please try again later.")
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def snapshot(self) -> dict:
+        """Get current queue depth and counters."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "disconnected": self.disconnected,
+        }
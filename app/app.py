@@ -1,11 +1,14 @@
 """FastAPI application for AskPESU backend APIs."""
 
 import argparse
+import asyncio
 import datetime
+import functools
 import logging
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
+from typing import TypeVar
 
 import pytz
 import torch
@@ -15,11 +18,26 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from google.api_core.exceptions import ResourceExhausted
-
-from app.docs import ask_docs, health_docs, index_docs, quota_docs
-from app.models import AskRequestModel, AskResponseModel, HealthResponseModel, QuotaResponseModel
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.admission import AdmissionController, ClientDisconnectedError, DeadlineExceededError, OverloadedError
+from app.docs import ask_docs, health_docs, index_docs, metrics_docs, quota_docs
+from app.intent import IntentGate
+from app.models import (
+    AskRequestModel,
+    AskResponseModel,
+    HealthResponseModel,
+    MetricsResponseModel,
+    QuotaResponseModel,
+)
 from app.quota import QuotaState
 from app.rag import RetrievalAugmentedGenerator
+from app.recorder import StageTimer, TrafficRecorder, load_records, sanitize, warm_up
+from app.routing import ComplexityRouter
+from app.sessions import RewriteCapture, Session, SessionNotFoundError, SessionStore
+
+T = TypeVar("T")
 
 
 @asynccontextmanager
@@ -29,13 +47,76 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     logging.info("AskPESU API startup")
 
     # Initialize the RAG engine
-    global rag
+    global rag, intent_gate, admission, sessions, router, recorder
     config_path = getattr(app.state, "config_path", "conf/config.yaml")
     rag = RetrievalAugmentedGenerator(config_path)
     logging.info("RAG pipeline initialized...")
 
+    # Initialize the intent gate, reusing the RAG embeddings
+    intent_config = rag.config.get("intent", {})
+    if intent_config.get("enabled", False):
+        intent_gate = IntentGate(rag.embedding, intent_config)
+        logging.info("Intent gate initialized...")
+
+    # Initialize admission control for /ask
+    admission_config = rag.config.get("admission", {})
+    if admission_config.get("enabled", False):
+        admission = AdmissionController(
+            max_in_flight=admission_config["max_in_flight"],
+            max_queue=admission_config["max_queue"],
+            max_wait_seconds=admission_config["max_wait_seconds"],
+            retry_after_seconds=admission_config["retry_after_seconds"],
+            deadline_seconds=admission_config["deadline_seconds"],
+            disconnect_poll_seconds=admission_config.get("disconnect_poll_seconds", 0.5),
+        )
+        logging.info("Admission control initialized...")
+
+    # Initialize the server-side session store
+    session_config = rag.config.get("sessions", {})
+    if session_config.get("enabled", False):
+        sessions = SessionStore(
+            max_sessions=session_config["max_sessions"],
+            ttl_seconds=session_config["ttl_seconds"],
+            max_turns=session_config["max_turns"],
+            rewrite_turns=session_config.get("rewrite_turns", session_config["max_turns"]),
+        )
+        logging.info("Session store initialized...")
+
+    # Initialize the complexity router for 'auto' thinking mode
+    routing_config = rag.config.get("routing", {})
+    if routing_config.get("enabled", False):
+        router = ComplexityRouter(rag.embedding, rag.vector_store, rag.qdrant_searcher, routing_config)
+        logging.info("Complexity router initialized...")
+
+    # Initialize the traffic recorder for /ask
+    recording_config = rag.config.get("recording", {})
+    if recording_config.get("enabled", False):
+        recorder = TrafficRecorder(
+            directory=recording_config["directory"],
+            max_records_per_file=recording_config["max_records_per_file"],
+            max_files=recording_config["max_files"],
+            queue_size=recording_config["queue_size"],
+            max_query_chars=recording_config["max_query_chars"],
+        )
+        logging.info("Traffic recorder initialized...")
+
+    # Warm up retrieval with recorded traffic before serving requests
+    warmup_config = rag.config.get("warmup", {})
+    if warmup_config.get("enabled", False):
+        start_time = time.perf_counter()
+        count = await warm_up(
+            rag.retriever,
+            load_records(warmup_config["logs"]),
+            max_queries=warmup_config["max_queries"],
+            concurrency=warmup_config["concurrency"],
+        )
+        logging.info(f"Warmed up retrieval with {count} recorded queries in {time.perf_counter() - start_time:.1f}s.")
+
     yield
     # Shutdown
+    await rag.aclose()
+    if recorder is not None:
+        recorder.close()
     logging.info("AskPESU API shutdown.")
 
 
@@ -78,6 +159,11 @@ app.add_middleware(
 DIST_DIR = "frontend/out"  # Directory for static files (built from frontend)
 IST = pytz.timezone("Asia/Kolkata")  # Indian Standard Time timezone
 rag: RetrievalAugmentedGenerator | None = None  # Global variable to hold the RAG instance
+intent_gate: IntentGate | None = None  # Global variable to hold the optional intent gate
+admission: AdmissionController | None = None  # Global variable to hold the optional admission controller
+sessions: SessionStore | None = None  # Global variable to hold the optional session store
+router: ComplexityRouter | None = None  # Global variable to hold the optional complexity router
+recorder: TrafficRecorder | None = None  # Global variable to hold the optional traffic recorder
 
 # Global state to track if 'thinking' mode is enabled
 THINKING_STATE = QuotaState(name="thinking", cooldown_hours=24)
@@ -98,6 +184,228 @@ def get_quota_status() -> dict:
     }
 
 
+def resolve_session(payload: AskRequestModel) -> Session | None:
+    """Resume the session referenced by a request, if any.
+
+    Raises:
+        SessionNotFoundError: If the referenced session is unknown, expired, or sessions are disabled.
+    """
+    if payload.session_id is None:
+        return None
+    if sessions is None:
+        raise SessionNotFoundError(payload.session_id)
+    return sessions.get(payload.session_id)
+
+
+def save_session(payload: AskRequestModel, session: Session | None, turn: tuple[str, str] | None = None) -> str | None:
+    """Add a successfully answered turn to the request's session, starting the session first if requested.
+
+    Sessions are only started once a request has succeeded, so no id is handed out for a failed request.
+
+    Returns:
+        str | None: The id of the session, if any.
+    """
+    if session is None:
+        if not payload.session or sessions is None:
+            return None
+        session = sessions.create(rag.build_chat_history(payload.query, payload.history))
+    if turn is not None:
+        sessions.append(session, *turn)
+    return session.id
+
+
+async def resolve_thinking(payload: AskRequestModel) -> tuple[bool, bool]:
+    """Resolve the requested thinking mode, routing 'auto' requests by query complexity.
+
+    Returns:
+        tuple[bool, bool]: Whether to use the thinking LLM, and whether that choice was made by the router.
+    """
+    if payload.thinking != "auto":
+        return payload.thinking, False
+    if router is None:
+        return False, False
+
+    decision = await router.route(payload.query)
+    return decision.thinking, True
+
+
+def check_quota(thinking: bool) -> tuple[bool, bool]:
+    """Pick an LLM with quota left, falling back from thinking to primary, and from primary to the local fallback LLM.
+
+    Returns:
+        tuple[bool, bool]: Whether to use the thinking LLM, and whether to answer with the local fallback LLM in
+            degraded mode.
+
+    Raises:
+        ResourceExhausted: If the primary LLM is unavailable and no fallback LLM is configured.
+    """
+    # Use thinking mode if requested and enabled, and the primary LLM otherwise
+    if thinking and THINKING_STATE.enabled:
+        return True, False
+    if thinking:
+        logging.warning("Thinking mode was requested but is currently unavailable due to quota limits. Using primary.")
+    if PRIMARY_STATE.enabled:
+        return False, False
+
+    # Degrade to the local fallback LLM only once the primary LLM is unavailable as well
+    logging.warning("Primary LLM is currently unavailable due to quota limits.")
+    if rag.fallback_available:
+        logging.info("Answering in degraded mode with the local fallback LLM.")
+        return False, True
+    raise ResourceExhausted("The LLMs are temporarily unavailable due to quota limits. Please try again later.")
+
+
+async def generate_answer(
+    payload: AskRequestModel, chat_history: list[BaseMessage] | None, config: RunnableConfig | None
+) -> tuple[str, bool, bool, bool]:
+    """Route a request, check quota and generate its answer, retrying with the next available LLM if one runs out.
+
+    Returns:
+        tuple[str, bool, bool, bool]: The answer, whether the thinking LLM was used, whether that choice was made by
+            the router, and whether the answer was generated in degraded mode.
+    """
+    # Route 'auto' requests between the primary and thinking LLMs
+    thinking, routed = await resolve_thinking(payload)
+
+    # Check quota, falling back to the primary LLM and then to the local fallback LLM
+    thinking, degraded = check_quota(thinking)
+
+    generation = functools.partial(
+        rag.generate,
+        query=payload.query,
+        history=payload.history,
+        chat_history=chat_history,
+        config=config,
+    )
+    while True:
+        try:
+            return await generation(thinking=thinking, degraded=degraded), thinking, routed, degraded
+        except ResourceExhausted:
+            if degraded:
+                raise
+            llm_state = THINKING_STATE if thinking else PRIMARY_STATE
+            llm_state.disable()
+            logging.info(f"The {llm_state.name} LLM ran out of quota, retrying with the next available LLM.")
+            thinking, degraded = check_quota(False)
+
+
+async def run_generation(request: Request, generation: Callable[[], Awaitable[T]]) -> T:
+    """Run answer generation, including routing, under admission control, if enabled."""
+    if admission is None:
+        return await generation()
+    async with admission.admit():
+        return await admission.run(request, generation())
+
+
+def error_status(exc: BaseException) -> int:
+    """Get the HTTP status code an /ask request failing with an exception is answered with."""
+    for exc_type, status_code in (
+        (SessionNotFoundError, 404),
+        (ResourceExhausted, 429),
+        (ClientDisconnectedError, 499),
+        (asyncio.CancelledError, 499),
+        (OverloadedError, 503),
+        (DeadlineExceededError, 504),
+    ):
+        if isinstance(exc, exc_type):
+            return status_code
+    return 500
+
+
+def record_traffic(
+    payload: AskRequestModel,
+    timestamp: datetime.datetime,
+    latency: float,
+    timer: StageTimer | None = None,
+    **fields: str | int | bool,
+) -> None:
+    """Record a sanitized summary of an /ask request and its outcome, if recording is enabled."""
+    if recorder is None:
+        return
+    recorder.record(
+        {
+            "timestamp": timestamp.isoformat(),
+            "query": sanitize(payload.query, recorder.max_query_chars),
+            "thinking": payload.thinking,
+            "history_length": len(payload.history),
+            "latency": latency,
+            "timings": timer.timings if timer else {},
+            "doc_ids": timer.doc_ids if timer else [],
+            **fields,
+        }
+    )
+
+
+async def answer_query(
+    payload: AskRequestModel,
+    request: Request,
+    current_time: datetime.datetime,
+    start_time: float,
+    timer: StageTimer | None,
+    outcome: dict,
+) -> JSONResponse:
+    """Answer an /ask request, filling `outcome` with the details of how it was answered for traffic recording."""
+    global THINKING_STATE, PRIMARY_STATE
+
+    # Resume a server-side session, if requested
+    session = resolve_session(payload)
+    if session is not None:
+        outcome["history_length"] = len(session.messages) // 2
+
+    # Answer greetings, off-topic and abusive queries without touching the LLMs. The gate bounds its own embeddings,
+    # so it runs before admission control and canned replies never wait for an LLM slot
+    if intent_gate is not None:
+        decision = await intent_gate.classify(payload.query)
+        if not decision.passed:
+            logging.info(f"Query short-circuited by intent gate as '{decision.label}' ({decision.score:.3f}).")
+            outcome["intent"] = decision.label
+            latency = round(time.perf_counter() - start_time, 3)
+            response = AskResponseModel(
+                status=True,
+                message="Answer generated successfully.",
+                answer=decision.response,
+                timestamp=current_time,
+                latency=latency,
+                session_id=save_session(payload, session),
+            )
+            return JSONResponse(status_code=200, content=response.model_dump(mode="json", exclude_none=True))
+
+    # Re-enable thinking mode and primary LLM if cooldown period has expired
+    THINKING_STATE.refresh()
+    PRIMARY_STATE.refresh()
+
+    # Generate the answer under admission control, timing each stage if recording and keeping the rewritten
+    # question for sessions
+    rewrite = RewriteCapture() if sessions is not None and (session or payload.session) else None
+    callbacks = [handler for handler in (timer, rewrite) if handler is not None]
+    answer, thinking, routed, degraded = await run_generation(
+        request,
+        functools.partial(
+            generate_answer,
+            payload,
+            chat_history=sessions.rewrite_history(session) if session else None,
+            config={"callbacks": callbacks} if callbacks else None,
+        ),
+    )
+
+    session_id = save_session(payload, session, ((rewrite and rewrite.question) or payload.query, answer))
+
+    latency = round(time.perf_counter() - start_time, 3)
+    if routed:
+        router.record("degraded" if degraded else "thinking" if thinking else "primary", latency)
+    outcome.update(used_thinking=thinking, degraded=degraded)
+    response = AskResponseModel(
+        status=True,
+        message="Answer generated successfully.",
+        answer=answer,
+        timestamp=current_time,
+        latency=latency,
+        session_id=session_id,
+        degraded=degraded,
+    )
+    return JSONResponse(status_code=200, content=response.model_dump(mode="json", exclude_none=True))
+
+
 @app.exception_handler(ResourceExhausted)
 async def resource_exhausted_exception_handler(_request: Request, exc: ResourceExhausted) -> JSONResponse:
     """Handler for resource exhausted exceptions."""
@@ -113,6 +421,59 @@ async def resource_exhausted_exception_handler(_request: Request, exc: ResourceE
     )
 
 
+@app.exception_handler(OverloadedError)
+async def overloaded_exception_handler(_request: Request, exc: OverloadedError) -> JSONResponse:
+    """Handler for requests shed by admission control."""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "status": False,
+            "message": str(exc),
+            "timestamp": datetime.datetime.now(IST).isoformat(),
+        },
+    )
+
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_exception_handler(_request: Request, exc: DeadlineExceededError) -> JSONResponse:
+    """Handler for requests cancelled after exceeding their deadline."""
+    return JSONResponse(
+        status_code=504,
+        content={
+            "status": False,
+            "message": str(exc),
+            "timestamp": datetime.datetime.now(IST).isoformat(),
+        },
+    )
+
+
+@app.exception_handler(ClientDisconnectedError)
+async def client_disconnected_exception_handler(_request: Request, exc: ClientDisconnectedError) -> JSONResponse:
+    """Handler for requests cancelled because the client disconnected. The response is never delivered."""
+    return JSONResponse(
+        status_code=499,
+        content={
+            "status": False,
+            "message": str(exc),
+            "timestamp": datetime.datetime.now(IST).isoformat(),
+        },
+    )
+
+
+@app.exception_handler(SessionNotFoundError)
+async def session_not_found_exception_handler(_request: Request, _exc: SessionNotFoundError) -> JSONResponse:
+    """Handler for requests referring to an unknown or expired session."""
+    return JSONResponse(
+        status_code=404,
+        content={
+            "status": False,
+            "message": "Session not found or expired. Please start a new session with the full history.",
+            "timestamp": datetime.datetime.now(IST).isoformat(),
+        },
+    )
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(_request: Request, _exc: Exception) -> JSONResponse:
     """Handler for unhandled exceptions."""
@@ -146,52 +507,34 @@ async def index() -> FileResponse:
     responses=ask_docs.response_examples,
     tags=["Generation"],
 )
-async def ask(payload: AskRequestModel) -> JSONResponse:
+async def ask(payload: AskRequestModel, request: Request) -> JSONResponse:
     """Endpoint to handle question-answering requests.
 
     Automatically manages LLM quota with cooldowns.
-    May raise 429 if 'thinking' or 'primary' mode is temporarily unavailable.
+    Falls back from 'thinking' mode to the primary LLM, and from the primary LLM to the local fallback LLM if enabled.
+    May raise 429 if the primary LLM is temporarily unavailable and no local fallback LLM is configured.
+    May raise 404 if the given session is unknown or has expired.
+    May raise 503 if the server is overloaded, or 504 if the request exceeds its deadline.
     """
-    global THINKING_STATE, PRIMARY_STATE
     logging.debug(f"Received /ask question: {payload.query}")
     logging.debug(f"Thinking mode: {payload.thinking}")
     current_time = datetime.datetime.now(IST)
-
-    # Re-enable thinking mode and primary LLM if cooldown period has expired
-    THINKING_STATE.refresh()
-    PRIMARY_STATE.refresh()
-
-    # Check if thinking mode is requested and enabled
-    if payload.thinking and not THINKING_STATE.enabled:
-        logging.warning("Thinking mode was requested but currently unavailable due to quota limits.")
-        raise ResourceExhausted(
-            "Thinking mode is temporarily unavailable due to quota limits. "
-            "Please try again later, or disable 'thinking' mode if enabled."
-        )
-
-    # Check if primary LLM is requested and enabled
-    if not payload.thinking and not PRIMARY_STATE.enabled:
-        logging.warning("Primary LLM is currently unavailable due to quota limits.")
-        raise ResourceExhausted("Primary LLM is temporarily unavailable due to quota limits. Please try again later.")
-
-    # Attempt to generate the answer
     start_time = time.perf_counter()
+
+    # Record every request with its outcome, including the ones rejected or cancelled, so replays reproduce the load
+    timer = StageTimer() if recorder is not None else None
+    outcome = {}
+    status_code = 500
     try:
-        answer = await rag.generate(query=payload.query, thinking=payload.thinking, history=payload.history)
-    except ResourceExhausted:
-        llm_state = THINKING_STATE if payload.thinking else PRIMARY_STATE
-        llm_state.disable()
+        response = await answer_query(payload, request, current_time, start_time, timer, outcome)
+        status_code = response.status_code
+        return response
+    except BaseException as exc:
+        status_code = error_status(exc)
         raise
-
-    latency = round(time.perf_counter() - start_time, 3)
-    response = AskResponseModel(
-        status=True,
-        message="Answer generated successfully.",
-        answer=answer,
-        timestamp=current_time,
-        latency=latency,
-    )
-    return JSONResponse(status_code=200, content=response.model_dump(mode="json", exclude_none=True))
+    finally:
+        latency = round(time.perf_counter() - start_time, 3)
+        record_traffic(payload, current_time, latency, timer, status=status_code, **outcome)
 
 
 @app.get(
@@ -232,6 +575,38 @@ async def quota() -> JSONResponse:
     return JSONResponse(status_code=200, content=response.model_dump(mode="json", exclude_none=True))
 
 
+@app.get(
+    "/metrics",
+    response_model=MetricsResponseModel,
+    response_class=JSONResponse,
+    openapi_extra=metrics_docs.request_examples,
+    responses=metrics_docs.response_examples,
+    tags=["Monitoring"],
+)
+async def metrics() -> JSONResponse:
+    """Pipeline metrics endpoint."""
+    logging.debug("Metrics requested.")
+    pipeline_metrics = {"speculation": rag.speculation_stats.snapshot()}
+    if rag.prompt_cache is not None:
+        pipeline_metrics["context_cache"] = rag.prompt_cache.snapshot()
+    if admission is not None:
+        pipeline_metrics["admission"] = admission.snapshot()
+    if intent_gate is not None:
+        pipeline_metrics["intent"] = intent_gate.snapshot()
+    if sessions is not None:
+        pipeline_metrics["sessions"] = sessions.snapshot()
+    if router is not None:
+        pipeline_metrics["routing"] = router.snapshot()
+    if recorder is not None:
+        pipeline_metrics["recording"] = recorder.snapshot()
+    response = MetricsResponseModel(
+        status=True,
+        metrics=pipeline_metrics,
+        timestamp=datetime.datetime.now(IST),
+    )
+    return JSONResponse(status_code=200, content=response.model_dump(mode="json", exclude_none=True))
+
+
 def main() -> None:
     """Main function to run the FastAPI application with command line arguments."""
     # Set up argument parser for command line arguments
@@ -0,0 +1,51 @@
+"""Lightweight nearest-centroid text classifier over the RAG embedding model."""
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CentroidClassifier:
+    """Classifies text by cosine similarity to the mean embedding of each label's examples."""
+
+    def __init__(self, embedding: Embeddings, examples: dict[str, list[str]]) -> None:
+        """Compute the label centroids from labelled examples.
+
+        Args:
+            embedding (Embeddings): The embedding model used for both examples and queries.
+            examples (dict[str, list[str]]): Example texts keyed by label.
+        """
+        self.embedding = embedding
+        self.labels = list(examples)
+        centroids = []
+        for label in self.labels:
+            vectors = self._normalize(np.asarray(embedding.embed_documents(examples[label])))
+            centroids.append(vectors.mean(axis=0))
+        self.centroids = self._normalize(np.asarray(centroids))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Scale vectors to unit length along the last axis."""
+        return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    def scores(self, vector: list[float]) -> dict[str, float]:
+        """Get the cosine similarity of an embedded text to every label centroid.
+
+        Args:
+            vector (list[float]): The embedding of the text to classify.
+
+        Returns:
+            dict[str, float]: Similarity scores keyed by label.
+        """
+        similarities = self.centroids @ self._normalize(np.asarray(vector))
+        return dict(zip(self.labels, similarities.tolist(), strict=True))
+
+    async def ascores(self, text: str) -> dict[str, float]:
+        """Embed a text and get its similarity to every label centroid.
+
+        Args:
+            text (str): The text to classify.
+
+        Returns:
+            dict[str, float]: Similarity scores keyed by label.
+        """
+        return self.scores(await self.embedding.aembed_query(text))
@@ -0,0 +1,177 @@
+"""Provider-side caching of the static instruction portion of prompts."""
+
+import asyncio
+import datetime
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Protocol
+
+from google.ai import generativelanguage_v1beta as genai
+
+
+class ContextCacheProvider(Protocol):
+    """Interface for a provider that can cache a system instruction for a model."""
+
+    def create(self, model: str, system_instruction: str, ttl_seconds: int) -> str:
+        """Create a cache holding the system instruction and return its name."""
+        ...
+
+    def refresh(self, name: str, ttl_seconds: int) -> None:
+        """Extend the lifetime of an existing cache."""
+        ...
+
+
+class GeminiContextCacheProvider:
+    """Context cache provider backed by the Gemini API."""
+
+    def __init__(self, api_key: str) -> None:
+        """Initialize the Gemini cache service client.
+
+        Args:
+            api_key (str): The Gemini API key.
+        """
+        self.client = genai.CacheServiceClient(client_options={"api_key": api_key})
+
+    def create(self, model: str, system_instruction: str, ttl_seconds: int) -> str:
+        """Create a cached content entry holding the system instruction and return its name."""
+        cached_content = self.client.create_cached_content(
+            cached_content=genai.CachedContent(
+                model=f"models/{model}",
+                system_instruction=genai.Content(parts=[genai.Part(text=system_instruction)]),
+                ttl=datetime.timedelta(seconds=ttl_seconds),
+            )
+        )
+        return cached_content.name
+
+    def refresh(self, name: str, ttl_seconds: int) -> None:
+        """Extend the TTL of an existing cached content entry."""
+        self.client.update_cached_content(
+            cached_content=genai.CachedContent(name=name, ttl=datetime.timedelta(seconds=ttl_seconds)),
+            update_mask={"paths": ["ttl"]},
+        )
+
+
+@dataclass
+class CacheEntry:
+    """A cache created on the provider."""
+
+    name: str
+    expires_at: float
+
+
+class PromptCache:
+    """Creates, refreshes and hands out provider-side caches, falling back to uncached prompts on failure."""
+
+    def __init__(
+        self, provider: ContextCacheProvider, ttl_seconds: int, refresh_margin_seconds: int, retry_seconds: int
+    ) -> None:
+        """Initialize the prompt cache.
+
+        Args:
+            provider (ContextCacheProvider): The provider to create caches with.
+            ttl_seconds (int): Lifetime of each cache.
+            refresh_margin_seconds (int): Refresh a cache when it has less than this much lifetime left.
+            retry_seconds (int): How long to wait before retrying after the provider fails.
+        """
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_seconds = retry_seconds
+
+        self._specs: dict[str, tuple[str, str]] = {}
+        self._entries: dict[str, CacheEntry] = {}
+        self._retry_at: dict[str, float] = {}
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.invalidations = 0
+
+    def _failed(self, key: str, action: str, now: float) -> None:
+        """Record a provider failure and back off before trying again."""
+        self.failures += 1
+        self._retry_at[key] = now + self.retry_seconds
+        logging.warning(f"Failed to {action} context cache '{key}', using uncached prompts.", exc_info=True)
+
+    def register(self, key: str, model: str, system_instruction: str) -> None:
+        """Register a static system instruction and eagerly create its cache.
+
+        Args:
+            key (str): Identifier of the cache.
+            model (str): The model the cache is created for.
+            system_instruction (str): The static instruction to cache.
+        """
+        self._specs[key] = (model, system_instruction)
+        now = time.monotonic()
+        try:
+            name = self.provider.create(model, system_instruction, self.ttl_seconds)
+        except Exception:
+            self._failed(key, "create", now)
+            return
+        self._entries[key] = CacheEntry(name=name, expires_at=now + self.ttl_seconds)
+        logging.info(f"Created context cache '{key}' as {name}.")
+
+    async def aget(self, key: str) -> str | None:
+        """Get the name of a usable cache, refreshing or recreating it if needed.
+
+        Args:
+            key (str): Identifier of the cache.
+
+        Returns:
+            str | None: The cache name, or None if the uncached prompt should be used.
+        """
+        async with self._locks[key]:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            alive = entry is not None and entry.expires_at > now
+
+            if alive and entry.expires_at - now > self.refresh_margin_seconds or now < self._retry_at.get(key, 0):
+                return self._use(entry if alive else None)
+
+            try:
+                if alive:
+                    await asyncio.to_thread(self.provider.refresh, entry.name, self.ttl_seconds)
+                    entry.expires_at = now + self.ttl_seconds
+                else:
+                    model, system_instruction = self._specs[key]
+                    name = await asyncio.to_thread(self.provider.create, model, system_instruction, self.ttl_seconds)
+                    entry = self._entries[key] = CacheEntry(name=name, expires_at=now + self.ttl_seconds)
+                    alive = True
+            except Exception:
+                self._failed(key, "refresh" if alive else "create", now)
+
+            return self._use(entry if alive else None)
+
+    def invalidate(self, key: str, name: str) -> None:
+        """Forget a cache the provider rejected, e.g. because it was evicted early, so it is recreated on next use.
+
+        Args:
+            key (str): Identifier of the cache.
+            name (str): Name of the rejected cache. A newer cache created concurrently under the same key is kept.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.name == name:
+            del self._entries[key]
+            self.invalidations += 1
+            logging.warning(f"Context cache '{key}' ({name}) was rejected by the provider, invalidating it.")
+
+    def _use(self, entry: CacheEntry | None) -> str | None:
+        """Count a cache hit or miss and return the cache name, if any."""
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.name
+
+    def snapshot(self) -> dict:
+        """Get current counters."""
+        return {
+            "caches": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+        }
@@ -3,11 +3,13 @@
 from .ask import ask_docs
 from .health import health_docs
 from .index import index_docs
+from .metrics import metrics_docs
 from .quota import quota_docs
 
 __all__ = [
     "ask_docs",
     "health_docs",
     "index_docs",
+    "metrics_docs",
     "quota_docs",
 ]
@@ -17,6 +17,18 @@ ask_docs = ApiDocs(
                             "summary": "LLM Request with 'thinking' mode",
                             "value": {"query": "What is bootstrap at PES University?", "thinking": True},
                         },
+                        "with_auto_thinking": {
+                            "summary": "LLM Request routed automatically between standard and 'thinking' mode",
+                            "value": {"query": "What is bootstrap at PES University?", "thinking": "auto"},
+                        },
+                        "start_session": {
+                            "summary": "LLM Request starting a server-side session",
+                            "value": {"query": "What is bootstrap at PES University?", "session": True},
+                        },
+                        "continue_session": {
+                            "summary": "LLM Request continuing a server-side session",
+                            "value": {"query": "When does it start?", "session_id": "3f2b9c0e8d7a4b1c9e6f5a4d3c2b1a09"},
+                        },
                     }
                 }
             }
@@ -40,6 +52,20 @@ ask_docs = ApiDocs(
                         ),
                         "timestamp": "2024-07-28T22:30:10.103368+05:30",
                         "latency": 1.234,
+                        "degraded": False,
+                    }
+                }
+            },
+        },
+        404: {
+            "description": "Session Not Found",
+            "model": AskResponseModel,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": False,
+                        "message": "Session not found or expired. Please start a new session with the full history.",
+                        "timestamp": "2024-07-28T22:35:10.103368+05:30",
                     }
                 }
             },
@@ -51,7 +77,36 @@ ask_docs = ApiDocs(
                 "application/json": {
                     "example": {
                         "status": False,
-                        "message": "Thinking mode temporarily unavailable due to quota limits. Please try again later.",
+                        "message": "The LLMs are temporarily unavailable due to quota limits. Please try again later.",
+                        "timestamp": "2024-07-28T22:35:10.103368+05:30",
+                    }
+                }
+            },
+        },
+        503: {
+            "description": "Server Overloaded. Retry after the number of seconds in the Retry-After header.",
+            "model": AskResponseModel,
+            "headers": {
+                "Retry-After": {"description": "Seconds to wait before retrying.", "schema": {"type": "integer"}}
+            },
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": False,
+                        "message": "The server is currently overloaded. Please try again later.",
+                        "timestamp": "2024-07-28T22:35:10.103368+05:30",
+                    }
+                }
+            },
+        },
+        504: {
+            "description": "Request Deadline Exceeded",
+            "model": AskResponseModel,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": False,
+                        "message": "The request took too long to complete. Please try again later.",
                         "timestamp": "2024-07-28T22:35:10.103368+05:30",
                     }
                 }
@@ -0,0 +1,54 @@
+"""Custom docs for the /metrics route."""
+
+from app.docs.base import ApiDocs
+from app.models import MetricsResponseModel
+
+metrics_docs = ApiDocs(
+    request_examples={},
+    response_examples={
+        200: {
+            "description": "Pipeline Metrics",
+            "model": MetricsResponseModel,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": True,
+                        "metrics": {
+                            "admission": {
+                                "max_in_flight": 16,
+                                "in_flight": 3,
+                                "queued": 0,
+                                "admitted": 120,
+                                "shed": 2,
+                                "timed_out": 1,
+                                "disconnected": 4,
+                            },
+                            "intent": {"pesu": 110, "greeting": 12, "off_topic": 5},
+                            "speculation": {
+                                "attempts": 0,
+                                "hits": 0,
+                                "hit_rate": 0.0,
+                                "saved_seconds": 0.0,
+                                "wasted_seconds": 0.0,
+                            },
+                        },
+                        "timestamp": "2025-09-14T00:42:19+05:30",
+                    }
+                }
+            },
+        },
+        500: {
+            "description": "Internal Server Error",
+            "model": MetricsResponseModel,
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": False,
+                        "message": "Internal Server Error. Please try again later.",
+                        "timestamp": "2024-07-28T22:30:10.103368+05:30",
+                    }
+                }
+            },
+        },
+    },
+)
@@ -0,0 +1,91 @@
+"""Intent gate that answers greetings, off-topic and abusive queries before they reach the RAG chain."""
+
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass
+
+import yaml
+from langchain_core.embeddings import Embeddings
+
+from app.classifier import CentroidClassifier
+
+
+@dataclass(frozen=True)
+class IntentDecision:
+    """The outcome of classifying a query."""
+
+    label: str
+    score: float
+    response: str | None = None
+
+    @property
+    def passed(self) -> bool:
+        """Whether the query should be forwarded to the RAG chain."""
+        return self.response is None
+
+
+class IntentGate:
+    """Short-circuits queries that do not need the RAG chain with canned responses.
+
+    The gate runs before admission control, so that canned replies never wait for or take a slot meant for LLM
+    work. Its embeddings are bounded separately instead: at most `max_concurrency` queries are classified at once,
+    and queries arriving while the gate is saturated bypass it and are left to admission control.
+    """
+
+    def __init__(self, embedding: Embeddings, config: dict) -> None:
+        """Train the intent classifier from the labelled examples file.
+
+        Args:
+            embedding (Embeddings): The embedding model shared with the RAG pipeline.
+            config (dict): The `intent` section of the configuration.
+        """
+        with open(config["examples"]) as file:
+            examples = yaml.safe_load(file)
+
+        self.pass_label = config["pass_label"]
+        self.thresholds = config["thresholds"]
+        self.margin = config.get("margin", 0.0)
+        self.responses = config["responses"]
+        self.classifier = CentroidClassifier(embedding, examples)
+        self.counts = Counter()
+        self._semaphore = asyncio.Semaphore(config.get("max_concurrency", 4))
+
+    async def classify(self, query: str) -> IntentDecision:
+        """Decide whether a query should be answered by the RAG chain or with a canned response.
+
+        A query is only short-circuited when its closest label is not the pass label, its similarity clears
+        that label's threshold, and it beats the pass label by at least the configured margin.
+
+        Args:
+            query (str): The user's query.
+
+        Returns:
+            IntentDecision: The decision, with a canned response if the query was short-circuited.
+        """
+        if self._semaphore.locked():
+            self.counts["bypassed"] += 1
+            logging.debug("Intent gate saturated, forwarding query without classifying it.")
+            return IntentDecision(label=self.pass_label, score=0.0)
+
+        async with self._semaphore:
+            scores = await self.classifier.ascores(query)
+        label = max(scores, key=scores.get)
+        score = scores[label]
+
+        if (
+            label == self.pass_label
+            or score < self.thresholds.get(label, 1.0)
+            or score - scores[self.pass_label] < self.margin
+        ):
+            decision = IntentDecision(label=self.pass_label, score=scores[self.pass_label])
+        else:
+            decision = IntentDecision(label=label, score=score, response=self.responses[label])
+
+        self.counts[decision.label] += 1
+        logging.debug(f"Intent decision: {decision.label} ({decision.score:.3f}). Counts: {dict(self.counts)}")
+        return decision
+
+    def snapshot(self) -> dict:
+        """Get the number of queries per decision."""
+        return dict(self.counts)
@@ -3,6 +3,7 @@
 from .request.ask import AskRequestModel
 from .response.ask import AskResponseModel
 from .response.health import HealthResponseModel
+from .response.metrics import MetricsResponseModel
 from .response.quota import QuotaResponseModel
 
-__all__ = ["AskRequestModel", "AskResponseModel", "HealthResponseModel", "QuotaResponseModel"]
+__all__ = ["AskRequestModel", "AskResponseModel", "HealthResponseModel", "MetricsResponseModel", "QuotaResponseModel"]
@@ -1,5 +1,7 @@
 """Model representing a request made to the /ask route."""
 
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -22,10 +24,11 @@ class AskRequestModel(BaseModel):
         json_schema_extra={"example": "What is bootstrap?"},
     )
 
-    thinking: bool = Field(
+    thinking: bool | Literal["auto"] = Field(
         False,
         title="Thinking Mode",
-        description="Flag to indicate if the model should 'think' before answering to produce more accurate responses.",
+        description="Flag to indicate if the model should 'think' before answering to produce more accurate responses. "
+        "Set to 'auto' to let the server decide based on the query's complexity.",
         json_schema_extra={"example": True},
     )
 
@@ -39,3 +42,18 @@ class AskRequestModel(BaseModel):
             ]
         },
     )
+
+    session: bool = Field(
+        False,
+        title="Session Mode",
+        description="Flag to keep the conversation on the server. The response then includes a session id, and "
+        "later requests only need to send the new query along with it.",
+        json_schema_extra={"example": True},
+    )
+
+    session_id: str | None = Field(
+        None,
+        title="Session ID",
+        description="Id of a server-side session returned by a previous request. When set, 'history' is ignored.",
+        json_schema_extra={"example": "3f2b9c0e8d7a4b1c9e6f5a4d3c2b1a09"},
+    )
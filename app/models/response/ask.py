@@ -50,3 +50,18 @@ class AskResponseModel(BaseModel):
             "academic branches through simple and engaging activities."
         },
     )
+
+    degraded: bool = Field(
+        False,
+        title="Degraded Mode",
+        description="Indicates whether the answer was generated by the local fallback LLM because the primary "
+        "LLM was unavailable. Degraded answers skip query rewriting and use a shorter context.",
+        json_schema_extra={"example": False},
+    )
+
+    session_id: str | None = Field(
+        None,
+        title="Session ID",
+        description="Id of the server-side session to send with follow-up queries. Present only in session mode.",
+        json_schema_extra={"example": "3f2b9c0e8d7a4b1c9e6f5a4d3c2b1a09"},
+    )
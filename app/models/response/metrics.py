@@ -0,0 +1,45 @@
+"""Model representing the response for the /metrics route."""
+
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class MetricsResponseModel(BaseModel):
+    """Response model for the /metrics route."""
+
+    model_config = ConfigDict(strict=True)
+
+    status: bool = Field(
+        ...,
+        title="Request Status",
+        description="Indicates whether the metrics were successfully retrieved.",
+        json_schema_extra={"example": True},
+    )
+
+    metrics: dict[str, dict] = Field(
+        ...,
+        title="Metrics",
+        description="Counters reported by each component of the pipeline, keyed by component name.",
+        json_schema_extra={
+            "example": {
+                "admission": {
+                    "max_in_flight": 16,
+                    "in_flight": 3,
+                    "queued": 0,
+                    "admitted": 120,
+                    "shed": 2,
+                    "timed_out": 1,
+                    "disconnected": 4,
+                },
+                "intent": {"pesu": 110, "greeting": 12, "off_topic": 5},
+            }
+        },
+    )
+
+    timestamp: datetime = Field(
+        ...,
+        title="Request Timestamp",
+        description="Timestamp when the metrics were generated.",
+        json_schema_extra={"example": "2025-09-14T00:42:19+05:30"},
+    )
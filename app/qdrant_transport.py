@@ -0,0 +1,181 @@
+"""Async, pooled Qdrant transport with optional gRPC, per-call timeouts and retries with jitter."""
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import grpc
+import httpx
+from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+T = TypeVar("T")
+
+RETRYABLE_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+}
+
+
+def build_async_qdrant_client(
+    url: str | None, api_key: str | None, config: dict, in_memory: bool = False
+) -> AsyncQdrantClient:
+    """Build an async Qdrant client with a bounded connection pool and keepalive.
+
+    Args:
+        url (str | None): URL of the Qdrant server.
+        api_key (str | None): API key for the Qdrant server.
+        config (dict): The `qdrant_transport` section of the configuration.
+        in_memory (bool): Use an empty in-process instance instead of a server, e.g. for benchmarks.
+
+    Returns:
+        AsyncQdrantClient: The configured client.
+
+    Raises:
+        ValueError: If no URL is given and an in-memory instance was not requested.
+    """
+    if in_memory:
+        return AsyncQdrantClient(location=":memory:")
+    if url is None:
+        raise ValueError("No Qdrant URL configured. Set QDRANT_URL to the Qdrant server to retrieve from.")
+
+    keepalive_ms = int(config["keepalive_seconds"] * 1000)
+    return AsyncQdrantClient(
+        url=url,
+        api_key=api_key,
+        prefer_grpc=config.get("prefer_grpc", False),
+        grpc_port=config.get("grpc_port", 6334),
+        timeout=int(config["timeout_seconds"]),
+        limits=httpx.Limits(
+            max_connections=config["pool_size"],
+            max_keepalive_connections=config["pool_size"],
+            keepalive_expiry=config["keepalive_seconds"],
+        ),
+        grpc_options={
+            "grpc.keepalive_time_ms": keepalive_ms,
+            "grpc.keepalive_timeout_ms": min(keepalive_ms, 10_000),
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+        },
+    )
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Check whether a failed Qdrant call is worth retrying."""
+    if isinstance(exc, TimeoutError | ResponseHandlingException | httpx.TransportError):
+        return True
+    if isinstance(exc, UnexpectedResponse):
+        return exc.status_code == 429 or exc.status_code >= 500
+    if isinstance(exc, grpc.aio.AioRpcError):
+        return exc.code() in RETRYABLE_GRPC_CODES
+    return False
+
+
+class AsyncQdrantSearcher:
+    """Runs similarity searches against a Qdrant collection over the async client."""
+
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        embedding: Embeddings | None = None,
+        vector_name: str = "",
+        content_payload_key: str = "page_content",
+        metadata_payload_key: str = "metadata",
+        timeout_seconds: float = 5.0,
+        retries: int = 2,
+        backoff_seconds: float = 0.1,
+        max_backoff_seconds: float = 1.0,
+    ) -> None:
+        """Initialize the searcher.
+
+        Args:
+            client (AsyncQdrantClient): The async Qdrant client.
+            collection_name (str): The collection to search.
+            embedding (Embeddings | None): Embedding model used to search by text.
+            vector_name (str): Name of the vector to search, or empty for the default vector.
+            content_payload_key (str): Payload key holding the document content.
+            metadata_payload_key (str): Payload key holding the document metadata.
+            timeout_seconds (float): Timeout of each attempt.
+            retries (int): Number of retries after a retryable failure.
+            backoff_seconds (float): Base delay of the exponential backoff between retries.
+            max_backoff_seconds (float): Upper bound on the delay between retries.
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.embedding = embedding
+        self.vector_name = vector_name
+        self.content_payload_key = content_payload_key
+        self.metadata_payload_key = metadata_payload_key
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+    async def _call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Call the client with a per-attempt timeout, retrying retryable failures with full jitter."""
+        for attempt in range(self.retries + 1):
+            try:
+                async with asyncio.timeout(self.timeout_seconds):
+                    return await fn()
+            except Exception as exc:
+                if attempt == self.retries or not is_retryable(exc):
+                    raise
+                delay = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt))
+                logging.warning(f"Qdrant call failed ({exc!r}), retrying in {delay:.3f}s.")
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def search_by_vector(
+        self, vector: list[float], k: int, score_threshold: float | None = None
+    ) -> list[tuple[Document, float]]:
+        """Search for the documents closest to an embedding.
+
+        Args:
+            vector (list[float]): The query embedding.
+            k (int): Maximum number of documents to return.
+            score_threshold (float | None): Minimum score of returned documents.
+
+        Returns:
+            list[tuple[Document, float]]: Documents and their scores, best first.
+        """
+        response = await self._call(
+            lambda: self.client.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                using=self.vector_name or None,
+                limit=k,
+                score_threshold=score_threshold,
+                with_payload=True,
+            )
+        )
+        results = []
+        for point in response.points:
+            payload = point.payload or {}
+            metadata = dict(payload.get(self.metadata_payload_key) or {})
+            metadata["_id"] = point.id
+            metadata["_collection_name"] = self.collection_name
+            results.append(
+                (Document(page_content=payload.get(self.content_payload_key, ""), metadata=metadata), point.score)
+            )
+        return results
+
+    async def search_with_score(
+        self, query: str, k: int, score_threshold: float | None = None
+    ) -> list[tuple[Document, float]]:
+        """Embed a query and search for the closest documents.
+
+        Args:
+            query (str): The query text.
+            k (int): Maximum number of documents to return.
+            score_threshold (float | None): Minimum score of returned documents.
+
+        Returns:
+            list[tuple[Document, float]]: Documents and their scores, best first.
+        """
+        return await self.search_by_vector(await self.embedding.aembed_query(query), k, score_threshold)
@@ -1,32 +1,71 @@
 """Retrieval-Augmented Generation (RAG) pipeline implementation using LangChain and Qdrant."""
 
+import asyncio
+import functools
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
 
+import numpy as np
 import yaml
 from dotenv import load_dotenv
+from google.api_core.exceptions import GoogleAPIError, ResourceExhausted
 from langchain.chat_models import init_chat_model
 from langchain.retrievers.multi_query import MultiQueryRetriever
 from langchain_core.documents.base import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableSerializable
+from langchain_core.runnables import (
+    Runnable,
+    RunnableBranch,
+    RunnableConfig,
+    RunnableLambda,
+    RunnablePassthrough,
+    RunnableSerializable,
+)
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
 
+from app.context_cache import ContextCacheProvider, GeminiContextCacheProvider, PromptCache
+from app.qdrant_transport import AsyncQdrantSearcher, build_async_qdrant_client
+from app.retrieval import AdaptiveMultiQueryRetriever, AdaptiveRetriever
+from app.speculation import SpeculationStats
+
 load_dotenv()
 
 
+@dataclass(frozen=True)
+class RagStages:
+    """The individual stages of a RAG chain, kept around so they can be scheduled independently.
+
+    Stages are named 'rewrite', 'retrieval' and 'answer' in callbacks, so they can be timed per request.
+    """
+
+    rewriter: RunnableSerializable[dict, str]
+    retriever: Runnable[str, list[Document]]
+    answerer: RunnableSerializable[dict, str]
+
+
 class RetrievalAugmentedGenerator:
     """A class that encapsulates the Retrieval-Augmented Generation (RAG) pipeline."""
 
-    def __init__(self, config_path: str = "conf/config.yaml") -> None:
+    def __init__(
+        self, config_path: str = "conf/config.yaml", context_cache_provider: ContextCacheProvider | None = None
+    ) -> None:
         """Initialize the RAG pipeline with configuration from a YAML file.
 
         Args:
             config_path (str): Path to the configuration YAML file.
+            context_cache_provider (ContextCacheProvider | None): Provider used to cache static prompts when
+                `rag.context_cache` is enabled. Defaults to Gemini context caching.
         """
         # Load configuration from YAML file
         with open(config_path) as file:
@@ -43,6 +82,27 @@ class RetrievalAugmentedGenerator:
             client=self.qdrant_client,
         )
 
+        # Initialize the async Qdrant transport used for retrieval, if enabled
+        self.async_qdrant_client = None
+        self.qdrant_searcher = None
+        transport_config = self.config["rag"].get("qdrant_transport", {})
+        if transport_config.get("async", False):
+            self.async_qdrant_client = build_async_qdrant_client(
+                url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"), config=transport_config
+            )
+            self.qdrant_searcher = AsyncQdrantSearcher(
+                client=self.async_qdrant_client,
+                collection_name=self.config["rag"]["qdrant_collection"],
+                embedding=self.embedding,
+                vector_name=self.vector_store.vector_name,
+                content_payload_key=self.vector_store.content_payload_key,
+                metadata_payload_key=self.vector_store.metadata_payload_key,
+                timeout_seconds=transport_config["timeout_seconds"],
+                retries=transport_config["retries"],
+                backoff_seconds=transport_config["backoff_seconds"],
+                max_backoff_seconds=transport_config["max_backoff_seconds"],
+            )
+
         # Initialize LLM
         self.llm_primary = init_chat_model(
             model=self.config["rag"]["llm"]["primary"],
@@ -58,6 +118,16 @@ class RetrievalAugmentedGenerator:
                 google_api_key=os.getenv("GEMINI_API_KEY"),
             )
 
+        # Initialize the local fallback LLM tier used in degraded mode, if enabled. Each worker thread loads its
+        # own copy of the model on first use, since a llama.cpp model cannot serve concurrent calls.
+        self.fallback_config = self.config["rag"]["llm"].get("fallback", {})
+        self.fallback_executor = None
+        self._fallback_local = threading.local()
+        if self.fallback_config.get("enabled", False):
+            self.fallback_executor = ThreadPoolExecutor(
+                max_workers=self.fallback_config["max_workers"], thread_name_prefix="fallback-llm"
+            )
+
         # Initialize the prompt template
         self.prompt = ChatPromptTemplate.from_messages(
             [
@@ -66,90 +136,404 @@ class RetrievalAugmentedGenerator:
             ]
         )
 
+        self.frame_qn_instructions = (
+            "You are a question rewriting assistant. Your job is to rewrite the user's "
+            "question into an independent, self-contained question.\n\n"
+            "Rewrite rules:\n"
+            "1.ONLY use the chat history if the user's question is ambiguous or refers to previous context "
+            "(e.g., pronouns like 'he', 'she', 'it', 'they', 'that').\n"
+            "2.If the question is clear on its own, return it EXACTLY as it is.\n"
+            "3.When resolving a follow-up question, ALWAYS prioritize the most recent topic in the chat history"
+            "Do NOT pull context from older, unrelated parts of the conversation.\n"
+            "4.If the question could refer to multiple topics, choose the MOST RECENT plausible topic.\n"
+            "5.Do NOT invent or assume connections between unrelated topics.\n"
+            "6.Do NOT answer the question — only rewrite it."
+        )
         self.frame_qn_prompt = ChatPromptTemplate.from_messages(
             [
-                (
-                    "system",
-                    "You are a question rewriting assistant. Your job is to rewrite the user's "
-                    "question into an independent, self-contained question.\n\n"
-                    "Rewrite rules:\n"
-                    "1.ONLY use the chat history if the user's question is ambiguous or refers to previous context "
-                    "(e.g., pronouns like 'he', 'she', 'it', 'they', 'that').\n"
-                    "2.If the question is clear on its own, return it EXACTLY as it is.\n"
-                    "3.When resolving a follow-up question, ALWAYS prioritize the most recent topic in the chat history"
-                    "Do NOT pull context from older, unrelated parts of the conversation.\n"
-                    "4.If the question could refer to multiple topics, choose the MOST RECENT plausible topic.\n"
-                    "5.Do NOT invent or assume connections between unrelated topics.\n"
-                    "6.Do NOT answer the question — only rewrite it.\n\n"
-                    "Chat History:\n{chat_history}",
-                ),
+                ("system", self.frame_qn_instructions + "\n\nChat History:\n{chat_history}"),
                 ("human", "{input}"),
             ]
         )
 
+        # Prompts used when the static instructions are served from a provider-side context cache
+        self.cached_prompt = ChatPromptTemplate.from_messages(
+            [("human", "Question: {question}\nContext: {context}\nAnswer:")]
+        )
+        self.cached_frame_qn_prompt = ChatPromptTemplate.from_messages(
+            [("human", "Chat History:\n{chat_history}\n\nQuestion: {input}")]
+        )
+
+        # Initialize the provider-side context cache for the static instructions
+        self.prompt_cache = None
+        cache_config = self.config["rag"].get("context_cache", {})
+        if cache_config.get("enabled", False):
+            self.prompt_cache = PromptCache(
+                provider=context_cache_provider or GeminiContextCacheProvider(api_key=os.getenv("GEMINI_API_KEY")),
+                ttl_seconds=cache_config["ttl_seconds"],
+                refresh_margin_seconds=cache_config["refresh_margin_seconds"],
+                retry_seconds=cache_config["retry_seconds"],
+            )
+            for model in filter(
+                None, (self.config["rag"]["llm"]["primary"], self.config["rag"]["llm"].get("thinking"))
+            ):
+                self.prompt_cache.register(f"answer:{model}", model, self.config["rag"]["system_prompt"])
+                self.prompt_cache.register(f"rewrite:{model}", model, self.frame_qn_instructions)
+
+        # Speculative retrieval settings
+        speculative_config = self.config["rag"].get("speculative", {})
+        self.speculative = speculative_config.get("enabled", False)
+        self.speculative_threshold = speculative_config.get("similarity_threshold", 0.95)
+        self.speculation_stats = SpeculationStats()
+
+        # Initialize the retriever, adapting the number of documents per query if enabled
+        search_kwargs = self.config["rag"]["search_kwargs"]
+        adaptive_config = self.config["rag"].get("adaptive_retrieval", {})
+        self.adaptive_retrieval = adaptive_config.get("enabled", False)
+        if not self.adaptive_retrieval:
+            # A fixed depth is the degenerate case where exactly k documents are fetched and kept
+            adaptive_config = {"fetch_k": search_kwargs["k"], "min_k": search_kwargs["k"], "max_k": search_kwargs["k"]}
+        self.retriever = AdaptiveRetriever(
+            vector_store=self.vector_store,
+            searcher=self.qdrant_searcher,
+            score_threshold=search_kwargs["score_threshold"],
+            fetch_k=adaptive_config.get("fetch_k", 20),
+            min_k=adaptive_config.get("min_k", 2),
+            max_k=adaptive_config.get("max_k", search_kwargs["k"]),
+            min_gap=adaptive_config.get("min_gap", 0.05),
+        )
+
+        # Reply used without calling the LLM when no document clears the score threshold
+        self.no_context_answer = self.config["rag"].get(
+            "no_context_answer", "I'm sorry, I don't have that information."
+        )
+
         # Build the RAG chains
-        self.retriever = self.vector_store.as_retriever(search_kwargs=self.config["rag"]["search_kwargs"])
-        self.rag_chain_primary = self._build_chain(self.llm_primary)
-        self.rag_chain_thinking = self._build_chain(self.llm_thinking) if self.llm_thinking else None
+        self.stages_primary = self._build_stages(self.llm_primary, self.config["rag"]["llm"]["primary"])
+        self.stages_thinking = (
+            self._build_stages(self.llm_thinking, self.config["rag"]["llm"]["thinking"]) if self.llm_thinking else None
+        )
+        self.rag_chain_primary = self._build_chain(self.stages_primary)
+        self.rag_chain_thinking = self._build_chain(self.stages_thinking) if self.stages_thinking else None
 
-    def _build_chain(self, llm: BaseChatModel) -> RunnableSerializable[str, str]:
-        """Build the RAG chain using the specified LLM.
+    def _prompt_llm(
+        self,
+        llm: BaseChatModel,
+        cache_key: str,
+        prompt: ChatPromptTemplate,
+        cached_prompt: ChatPromptTemplate,
+    ) -> Runnable[dict, BaseMessage]:
+        """Compose a prompt with an LLM, serving the static instructions from the context cache when available.
 
         Args:
-            llm: The language model to use in the RAG chain.
+            llm: The language model to prompt.
+            cache_key (str): Identifier of the context cache holding the prompt's system instructions.
+            prompt (ChatPromptTemplate): The full prompt, including the system instructions.
+            cached_prompt (ChatPromptTemplate): The prompt without the cached system instructions.
 
         Returns:
-            RunnableSerializable: The constructed RAG chain.
+            Runnable: A runnable mapping prompt inputs to the LLM's response.
+        """
+        uncached_chain = prompt | llm
+        if self.prompt_cache is None:
+            return uncached_chain
+
+        async def invoke(inputs: dict, config: RunnableConfig) -> BaseMessage:
+            cache_name = await self.prompt_cache.aget(cache_key)
+            if cache_name is None:
+                return await uncached_chain.ainvoke(inputs, config)
+            try:
+                return await (cached_prompt | llm.bind(cached_content=cache_name)).ainvoke(inputs, config)
+            except ResourceExhausted:
+                # Quota errors are unrelated to the cache and are handled by the caller
+                raise
+            except (GoogleAPIError, ChatGoogleGenerativeAIError):
+                # The cache may have been evicted or expired on the provider before its local expiry
+                self.prompt_cache.invalidate(cache_key, cache_name)
+                return await uncached_chain.ainvoke(inputs, config)
+
+        return RunnableLambda(invoke)
+
+    def _build_stages(self, llm: BaseChatModel, model: str) -> RagStages:
+        """Build the individual RAG stages using the specified LLM.
+
+        Args:
+            llm: The language model to use in every stage.
+            model (str): Name of the language model, used to look up its context caches.
+
+        Returns:
+            RagStages: The query rewriter, multi-query retriever and answer generator.
         """
-        # Initialize multiquery retriever
-        multiquery_retriever = MultiQueryRetriever.from_llm(
-            retriever=self.retriever,
-            llm=llm,
+        rewriter = self._prompt_llm(llm, f"rewrite:{model}", self.frame_qn_prompt, self.cached_frame_qn_prompt)
+        # With adaptive retrieval, the depth is chosen once over the union of all query variants
+        multi_query_retriever = AdaptiveMultiQueryRetriever if self.adaptive_retrieval else MultiQueryRetriever
+        return RagStages(
+            rewriter=(rewriter | StrOutputParser()).with_config(run_name="rewrite"),
+            retriever=multi_query_retriever.from_llm(retriever=self.retriever, llm=llm).with_config(
+                run_name="retrieval"
+            ),
+            answerer=self._build_answerer(self._prompt_llm(llm, f"answer:{model}", self.prompt, self.cached_prompt)),
         )
 
+    def _build_answerer(self, prompted_llm: Runnable[dict, BaseMessage]) -> RunnableSerializable[dict, str]:
+        """Build the answer stage, which skips generation entirely when retrieval found nothing relevant.
+
+        Args:
+            prompted_llm: The prompt composed with the language model.
+
+        Returns:
+            RunnableSerializable: The answer stage.
+        """
+        return RunnableBranch(
+            (lambda inputs: not inputs["context"], RunnableLambda(lambda _: self.no_context_answer)),
+            prompted_llm | StrOutputParser(),
+        ).with_config(run_name="answer")
+
+    def _build_chain(self, stages: RagStages) -> RunnableSerializable[str, str]:
+        """Build the serial RAG chain from its stages.
+
+        Args:
+            stages: The stages to compose into the RAG chain.
+
+        Returns:
+            RunnableSerializable: The constructed RAG chain.
+        """
         history_aware_retriever = (
-            {"input": RunnablePassthrough(), "chat_history": RunnablePassthrough()}
-            | self.frame_qn_prompt
-            | llm
-            | StrOutputParser()
-            | multiquery_retriever
+            {"input": RunnablePassthrough(), "chat_history": RunnablePassthrough()} | stages.rewriter | stages.retriever
         )
 
-        return (
-            {
-                "context": history_aware_retriever | self.format_docs,
-                "question": RunnablePassthrough(),
-            }
-            | self.prompt
-            | llm
-            | StrOutputParser()
-        )
+        return {
+            "context": history_aware_retriever | self.format_docs,
+            "question": RunnablePassthrough(),
+        } | stages.answerer
+
+    def _build_degraded_chain(self, llm: BaseChatModel) -> RunnableSerializable[dict, str]:
+        """Build the degraded-mode RAG chain, which skips query rewriting and multi-query retrieval.
+
+        Args:
+            llm: The local language model to answer with.
+
+        Returns:
+            RunnableSerializable: The constructed degraded-mode RAG chain.
+        """
+        return {
+            "context": itemgetter("question")
+            | self.retriever.with_config(run_name="retrieval")
+            | self.format_docs_degraded,
+            "question": itemgetter("question"),
+        } | self._build_answerer(self.prompt | llm)
+
+    def _generate_degraded(self, query: str, cancelled: threading.Event, config: RunnableConfig | None = None) -> str:
+        """Generate a response with the local fallback LLM. Runs on a fallback worker thread.
+
+        A running llama.cpp call cannot be interrupted from the event loop, so the answer is streamed and generation
+        stops between tokens once the request is cancelled or the `max_seconds` budget runs out. This keeps an
+        abandoned request from holding a fallback worker.
+
+        Args:
+            query (str): The input query.
+            cancelled (threading.Event): Set when the request is cancelled, e.g. by its deadline or a disconnect.
+            config (RunnableConfig | None): Optional config passed to the chain.
+
+        Returns:
+            str: The generated response, cut short if the time budget ran out.
+        """
+        chain = getattr(self._fallback_local, "chain", None)
+        if chain is None:
+            # Imported lazily so that the local LLM backend is only required when the fallback tier is enabled
+            from langchain_community.chat_models import ChatLlamaCpp
+
+            llm = ChatLlamaCpp(
+                model_path=self.fallback_config["model_path"],
+                n_ctx=self.fallback_config["n_ctx"],
+                n_threads=self.fallback_config["n_threads"],
+                max_tokens=self.fallback_config["max_tokens"],
+                temperature=self.fallback_config.get("temperature", 0.2),
+            )
+            chain = self._fallback_local.chain = self._build_degraded_chain(llm)
+
+        deadline = time.monotonic() + self.fallback_config.get("max_seconds", 45)
+        chunks = []
+        stream = chain.stream({"question": query}, config)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                if cancelled.is_set():
+                    break
+                if time.monotonic() > deadline:
+                    logging.warning("Fallback LLM ran out of its time budget, returning a truncated answer.")
+                    break
+        finally:
+            # Closing the stream stops token generation in llama.cpp
+            stream.close()
+        return "".join(chunks)
+
+    async def aclose(self) -> None:
+        """Close network clients and worker threads held by the pipeline."""
+        if self.async_qdrant_client is not None:
+            await self.async_qdrant_client.close()
+        if self.fallback_executor is not None:
+            self.fallback_executor.shutdown(wait=False, cancel_futures=True)
 
     @staticmethod
     def format_docs(docs: list[Document]) -> str:
         """Format the retrieved documents into a single string."""
         return "\n\n".join(f"{doc.metadata['url']}\n{doc.page_content}" for doc in docs)
 
-    async def generate(self, query: str, thinking: bool, history: list) -> str:
-        """Generate a response for the given query using the RAG chain.
+    def format_docs_degraded(self, docs: list[Document]) -> str:
+        """Format the retrieved documents within the fallback LLM's shorter context budget."""
+        return self.format_docs(docs[: self.fallback_config["max_docs"]])[: self.fallback_config["max_context_chars"]]
+
+    @property
+    def fallback_available(self) -> bool:
+        """Whether the local fallback LLM tier is enabled."""
+        return self.fallback_executor is not None
+
+    async def _is_equivalent(self, query: str, rewritten: str) -> bool:
+        """Check whether a rewritten question is (nearly) the same as the original one.
 
         Args:
+            query (str): The original user query.
+            rewritten (str): The query produced by the rewrite stage.
+
+        Returns:
+            bool: True if retrieval results for the original query can be reused.
+        """
+        if query.strip().casefold() == rewritten.strip().casefold():
+            return True
+        original, candidate = np.asarray(await self.embedding.aembed_documents([query, rewritten]))
+        similarity = float(original @ candidate / (np.linalg.norm(original) * np.linalg.norm(candidate)))
+        return similarity >= self.speculative_threshold
+
+    @staticmethod
+    def _speculation_cost(task: asyncio.Task, retrieval_start: float | None) -> dict:
+        """Measure the retrieval time and LLM calls thrown away by a discarded speculative retrieval.
+
+        Args:
+            task (asyncio.Task): The cancelled or finished speculative retrieval task.
+            retrieval_start (float | None): When the retrieval started running, or None if it never did.
+
+        Returns:
+            dict: The wasted seconds and LLM calls, as keyword arguments for `SpeculationStats.record`.
+        """
+        if retrieval_start is None:
+            return {"seconds": 0.0, "wasted_llm_calls": 0}
+        if task.done() and not task.cancelled() and task.exception() is None:
+            _, seconds = task.result()
+        else:
+            seconds = time.perf_counter() - retrieval_start
+        # The multi-query retriever starts by asking the LLM for query variants
+        return {"seconds": seconds, "wasted_llm_calls": 1}
+
+    async def _generate_speculative(
+        self, stages: RagStages, query: str, chat_history: list, config: RunnableConfig | None = None
+    ) -> str:
+        """Generate a response, retrieving for the raw query while the rewrite stage runs.
+
+        If the rewritten question turns out to be equivalent to the raw query, the speculative retrieval is
+        reused. Otherwise it is cancelled and retrieval is repeated for the rewritten question.
+
+        Args:
+            stages (RagStages): The stages of the RAG chain to use.
             query (str): The input query.
-            thinking (bool): Flag to indicate if the model should 'think' before answering.
-            history (list): The entire chat history until the current query
+            chat_history (list): The chat history as LangChain messages.
+            config (RunnableConfig | None): Optional config passed to every stage.
 
         Returns:
             str: The generated response.
         """
-        chat_history = []
+        retrieval_start = None
+
+        async def timed_retrieval() -> tuple[list[Document], float]:
+            nonlocal retrieval_start
+            retrieval_start = time.perf_counter()
+            docs = await stages.retriever.ainvoke(query, config)
+            return docs, time.perf_counter() - retrieval_start
+
+        start_time = time.perf_counter()
+        speculative_task = asyncio.create_task(timed_retrieval())
+        try:
+            rewritten = await stages.rewriter.ainvoke({"input": query, "chat_history": chat_history}, config)
+            rewrite_latency = time.perf_counter() - start_time
+            hit = await self._is_equivalent(query, rewritten)
+        except BaseException:
+            speculative_task.cancel()
+            raise
+
+        if hit:
+            docs, retrieval_latency = await speculative_task
+            elapsed = time.perf_counter() - start_time
+            self.speculation_stats.record(hit=True, seconds=max(rewrite_latency + retrieval_latency - elapsed, 0.0))
+        else:
+            speculative_task.cancel()
+            await asyncio.gather(speculative_task, return_exceptions=True)
+            self.speculation_stats.record(hit=False, **self._speculation_cost(speculative_task, retrieval_start))
+            docs = await stages.retriever.ainvoke(rewritten, config)
+
+        return await stages.answerer.ainvoke({"question": query, "context": self.format_docs(docs)}, config)
+
+    @staticmethod
+    def build_chat_history(query: str, history: list) -> list[BaseMessage]:
+        """Convert client-side chat history into LangChain messages.
 
+        Args:
+            query (str): The current query.
+            history (list): The entire chat history until the current query
+
+        Returns:
+            list[BaseMessage]: Alternating human and AI messages.
+        """
+        chat_history = []
         for convo in history:
             if query != convo.query:  # Prevents repeating the same question when using the thinking model.
                 chat_history.append(HumanMessage(convo.query))
                 chat_history.append(AIMessage(convo.answer))
+        return chat_history
 
-        rag_chain = (
-            self.rag_chain_thinking if thinking and self.rag_chain_thinking is not None else self.rag_chain_primary
-        )
+    async def generate(
+        self,
+        query: str,
+        thinking: bool,
+        history: list,
+        speculative: bool | None = None,
+        chat_history: list[BaseMessage] | None = None,
+        degraded: bool = False,
+        config: RunnableConfig | None = None,
+    ) -> str:
+        """Generate a response for the given query using the RAG chain.
+
+        Args:
+            query (str): The input query.
+            thinking (bool): Flag to indicate if the model should 'think' before answering.
+            history (list): The entire chat history until the current query
+            speculative (bool | None): Whether to retrieve for the raw query while it is being rewritten.
+                Defaults to the `rag.speculative.enabled` config value.
+            chat_history (list[BaseMessage] | None): Chat history already converted to messages, e.g. from a
+                server-side session. Takes precedence over `history`.
+            degraded (bool): Flag to answer with the local fallback LLM, without using the chat history.
+            config (RunnableConfig | None): Optional config passed to the chain, e.g. with callbacks.
+
+        Returns:
+            str: The generated response.
+        """
+        if degraded:
+            loop = asyncio.get_running_loop()
+            cancelled = threading.Event()
+            try:
+                return await loop.run_in_executor(
+                    self.fallback_executor, functools.partial(self._generate_degraded, query, cancelled, config)
+                )
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        if chat_history is None:
+            chat_history = self.build_chat_history(query, history)
+
+        use_thinking = thinking and self.rag_chain_thinking is not None
+        if self.speculative if speculative is None else speculative:
+            stages = self.stages_thinking if use_thinking else self.stages_primary
+            return await self._generate_speculative(stages, query, chat_history, config)
 
-        return await rag_chain.ainvoke({"input": query, "question": query, "chat_history": chat_history})
+        rag_chain = self.rag_chain_thinking if use_thinking else self.rag_chain_primary
+        return await rag_chain.ainvoke({"input": query, "question": query, "chat_history": chat_history}, config)
@@ -0,0 +1,231 @@
+"""Recording of sanitized /ask traffic to rotating compressed JSONL logs for replay and warm-up."""
+
+import asyncio
+import datetime
+import glob
+import gzip
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, TextIO
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+
+REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"\bPES\d[A-Z]{2}\d{2}[A-Z]{2}\d{3}\b", re.IGNORECASE), "<srn>"),
+    (re.compile(r"(?<!\d)(?:\+?91[\s-]?)?[6-9]\d{9}(?!\d)"), "<phone>"),
+]
+
+
+def sanitize(text: str, max_chars: int) -> str:
+    """Redact personal identifiers from a query and truncate it.
+
+    Args:
+        text (str): The text to sanitize.
+        max_chars (int): Maximum number of characters to keep.
+
+    Returns:
+        str: The sanitized text.
+    """
+    for pattern, replacement in REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text[:max_chars]
+
+
+class StageTimer(BaseCallbackHandler):
+    """Callback handler that times the named RAG stages of a request and collects the retrieved document ids."""
+
+    STAGES = {"rewrite", "retrieval", "answer"}
+    run_inline = True
+
+    def __init__(self) -> None:
+        """Initialize an empty set of timings."""
+        self.timings: dict[str, float] = {}
+        self.doc_ids: list[str] = []
+        self._starts: dict[UUID, tuple[str, float]] = {}
+
+    def _start(self, run_id: UUID, name: str | None) -> None:
+        """Start timing a run if it is one of the named stages."""
+        if name in self.STAGES:
+            self._starts[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id: UUID) -> str | None:
+        """Stop timing a run, accumulating time for stages that run more than once."""
+        if run_id not in self._starts:
+            return None
+        name, start = self._starts.pop(run_id)
+        self.timings[name] = round(self.timings.get(name, 0.0) + time.perf_counter() - start, 3)
+        return name
+
+    def on_chain_start(
+        self, serialized: dict[str, Any], inputs: dict[str, Any], *, run_id: UUID, **kwargs: object
+    ) -> None:
+        """Start timing a chain stage."""
+        self._start(run_id, kwargs.get("name"))
+
+    def on_chain_end(self, outputs: dict[str, Any], *, run_id: UUID, **kwargs: object) -> None:
+        """Stop timing a chain stage."""
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: object) -> None:
+        """Stop timing a failed chain stage."""
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized: dict[str, Any], query: str, *, run_id: UUID, **kwargs: object) -> None:
+        """Start timing the retrieval stage."""
+        self._start(run_id, kwargs.get("name"))
+
+    def on_retriever_end(self, documents: list[Document], *, run_id: UUID, **kwargs: object) -> None:
+        """Stop timing the retrieval stage and collect the retrieved document ids."""
+        if self._end(run_id) is not None:
+            self.doc_ids.extend(str(doc.metadata["_id"]) for doc in documents if "_id" in doc.metadata)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: object) -> None:
+        """Stop timing a failed or cancelled retrieval stage."""
+        self._end(run_id)
+
+
+class TrafficRecorder:
+    """Appends records to rotating gzip-compressed JSONL files from a background writer thread.
+
+    The request path only enqueues records, so no file I/O happens on it. When the queue is full, records are
+    dropped rather than slowing requests down.
+    """
+
+    def __init__(
+        self, directory: str, max_records_per_file: int, max_files: int, queue_size: int, max_query_chars: int
+    ) -> None:
+        """Initialize the recorder and start its writer thread.
+
+        Args:
+            directory (str): Directory the logs are written to.
+            max_records_per_file (int): Number of records after which a new file is started.
+            max_files (int): Number of files to keep. The oldest files are deleted beyond this.
+            queue_size (int): Maximum number of records waiting to be written.
+            max_query_chars (int): Maximum number of characters of each query to record.
+        """
+        self.directory = Path(directory)
+        self.max_query_chars = max_query_chars
+        self.max_records_per_file = max_records_per_file
+        self.max_files = max_files
+        self._queue: queue.Queue[dict | None] = queue.Queue(maxsize=queue_size)
+        self.recorded = 0
+        self.dropped = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._write_loop, name="traffic-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, record: dict) -> None:
+        """Enqueue a record to be written.
+
+        Args:
+            record (dict): A JSON-serializable record.
+        """
+        try:
+            self._queue.put_nowait(record)
+            self.recorded += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self) -> TextIO:
+        """Start a new log file and delete the oldest ones beyond the limit."""
+        files = sorted(self.directory.glob("traffic-*.jsonl.gz"))
+        for old_file in files[: max(len(files) - self.max_files + 1, 0)]:
+            old_file.unlink(missing_ok=True)
+        name = datetime.datetime.now(datetime.UTC).strftime("traffic-%Y%m%d-%H%M%S-%f.jsonl.gz")
+        return gzip.open(self.directory / name, "wt", encoding="utf-8")
+
+    def _write_loop(self) -> None:
+        """Write queued records until the sentinel is received."""
+        file, count = None, 0
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                if file is None or count >= self.max_records_per_file:
+                    if file is not None:
+                        file.close()
+                    file, count = self._open(), 0
+                file.write(json.dumps(record, default=str) + "\n")
+                count += 1
+                # Flush whenever the queue drains so the file stays readable up to the last record
+                if self._queue.empty():
+                    file.flush()
+            except Exception:
+                logging.exception("Failed to write traffic record.")
+        if file is not None:
+            file.close()
+
+    def close(self) -> None:
+        """Write the remaining records and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def snapshot(self) -> dict:
+        """Get current counters."""
+        return {
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+def load_records(paths: list[str]) -> list[dict]:
+    """Load recorded requests from gzip-compressed JSONL logs, ordered by timestamp.
+
+    Args:
+        paths (list[str]): Paths or glob patterns of the logs.
+
+    Returns:
+        list[dict]: The recorded requests.
+    """
+    records = []
+    for path in sorted({file for pattern in paths for file in glob.glob(pattern)}):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            try:
+                records.extend(json.loads(line) for line in file if line.strip())
+            except EOFError:
+                # The newest log may still be open by the recorder; keep what was flushed
+                pass
+    return sorted(records, key=lambda record: record["timestamp"])
+
+
+async def warm_up(retriever: BaseRetriever, records: list[dict], max_queries: int, concurrency: int) -> int:
+    """Run recorded queries through retrieval, without calling any LLM.
+
+    This loads the embedding model, opens the Qdrant connection pool of the serving process and brings the
+    collection into Qdrant's own caches before traffic arrives. It must run in the process that serves requests.
+
+    Args:
+        retriever (BaseRetriever): The retriever used to answer requests.
+        records (list[dict]): Recorded requests, as returned by `load_records`.
+        max_queries (int): Maximum number of unique queries to run, most recent first.
+        concurrency (int): Maximum number of retrievals in flight.
+
+    Returns:
+        int: The number of queries run.
+    """
+    # Queries short-circuited by the intent gate never reach retrieval in production either
+    queries = list(dict.fromkeys(record["query"] for record in reversed(records) if not record.get("intent")))
+    queries = queries[:max_queries]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def retrieve(query: str) -> None:
+        async with semaphore:
+            try:
+                await retriever.ainvoke(query)
+            except Exception:
+                logging.warning(f"Warm-up retrieval failed for a recorded query: {query!r}", exc_info=True)
+
+    await asyncio.gather(*(retrieve(query) for query in queries))
+    return len(queries)
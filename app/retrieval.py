@@ -0,0 +1,126 @@
+"""Adaptive-depth retrieval that picks the number of documents per query from the score distribution."""
+
+import asyncio
+
+from langchain.retrievers.multi_query import MultiQueryRetriever
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from app.qdrant_transport import AsyncQdrantSearcher
+
+
+def select_k(scores: list[float], min_k: int, max_k: int, min_gap: float) -> int:
+    """Pick how many of the top-scoring documents to keep by looking for an elbow in the scores.
+
+    The cut is placed at the largest drop between consecutive scores within the top `max_k`, then clamped to at
+    least `min_k` documents. If no drop is at least `min_gap`, the scores are considered flat and up to `max_k`
+    documents are kept.
+
+    Args:
+        scores (list[float]): Relevance scores sorted in descending order.
+        min_k (int): Minimum number of documents to keep, if available.
+        max_k (int): Maximum number of documents to keep.
+        min_gap (float): Smallest score drop that counts as an elbow.
+
+    Returns:
+        int: The number of documents to keep.
+    """
+    upper = min(len(scores), max_k)
+    best_k, best_gap = upper, 0.0
+    for k in range(1, upper):
+        gap = scores[k - 1] - scores[k]
+        if gap > best_gap:
+            best_k, best_gap = k, gap
+    if best_gap < min_gap:
+        return upper
+    return min(max(best_k, min_k), upper)
+
+
+class AdaptiveRetriever(BaseRetriever):
+    """Retriever that over-fetches candidates and keeps a per-query number of them.
+
+    Only documents scoring at least `score_threshold` are considered, so off-topic queries retrieve nothing.
+    Async retrieval goes through `searcher` when one is provided, and falls back to the vector store otherwise.
+    """
+
+    vector_store: VectorStore
+    searcher: AsyncQdrantSearcher | None = None
+    score_threshold: float = 0.3
+    fetch_k: int = 20
+    min_k: int = 2
+    max_k: int = 8
+    min_gap: float = 0.05
+
+    def search(self, query: str) -> list[tuple[Document, float]]:
+        """Fetch the candidate documents for a query with their relevance scores."""
+        return self.vector_store.similarity_search_with_score(
+            query, k=self.fetch_k, score_threshold=self.score_threshold
+        )
+
+    async def asearch(self, query: str) -> list[tuple[Document, float]]:
+        """Asynchronously fetch the candidate documents for a query with their relevance scores."""
+        if self.searcher is not None:
+            return await self.searcher.search_with_score(query, k=self.fetch_k, score_threshold=self.score_threshold)
+        return await self.vector_store.asimilarity_search_with_score(
+            query, k=self.fetch_k, score_threshold=self.score_threshold
+        )
+
+    def select(self, results: list[tuple[Document, float]]) -> list[Document]:
+        """Keep the top documents up to the elbow of the score distribution.
+
+        Candidates found more than once, e.g. by several query variants, are merged by their point id and keep
+        their best score.
+
+        Args:
+            results (list[tuple[Document, float]]): Candidate documents and their scores, in any order.
+
+        Returns:
+            list[Document]: The kept documents, best first.
+        """
+        best: dict[object, tuple[Document, float]] = {}
+        for doc, score in results:
+            key = doc.metadata.get("_id", doc.page_content)
+            if key not in best or score > best[key][1]:
+                best[key] = (doc, score)
+        ranked = sorted(best.values(), key=lambda result: result[1], reverse=True)
+        k = select_k([score for _, score in ranked], self.min_k, self.max_k, self.min_gap)
+        return [doc for doc, _ in ranked[:k]]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        """Retrieve the documents relevant to the query."""
+        return self.select(self.search(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        """Asynchronously retrieve the documents relevant to the query."""
+        return self.select(await self.asearch(query))
+
+
+class AdaptiveMultiQueryRetriever(MultiQueryRetriever):
+    """Multi-query retriever that picks the number of documents once, over the union of all query variants.
+
+    Selecting per variant would let every variant contribute up to `max_k` documents, so the candidates of all
+    variants are pooled and deduplicated first and the elbow is placed on the merged score distribution.
+    """
+
+    retriever: AdaptiveRetriever
+
+    def _queries(self, query: str, generated: list[str]) -> list[str]:
+        """Get the queries to search for, including the original one if configured."""
+        return [*generated, query] if self.include_original else generated
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        """Retrieve the documents relevant to any variant of the query."""
+        queries = self._queries(query, self.generate_queries(query, run_manager))
+        return self.retriever.select([result for q in queries for result in self.retriever.search(q)])
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        """Asynchronously retrieve the documents relevant to any variant of the query."""
+        queries = self._queries(query, await self.agenerate_queries(query, run_manager))
+        results = await asyncio.gather(*(self.retriever.asearch(q) for q in queries))
+        return self.retriever.select([result for variant in results for result in variant])
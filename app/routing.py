@@ -0,0 +1,135 @@
+"""Complexity-based routing of queries between the primary and thinking LLMs."""
+
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+
+import yaml
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.classifier import CentroidClassifier
+from app.qdrant_transport import AsyncQdrantSearcher
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """The outcome of scoring a query's complexity."""
+
+    thinking: bool
+    score: float
+    features: dict[str, float]
+
+    @property
+    def route(self) -> str:
+        """Name of the LLM the query is routed to."""
+        return "thinking" if self.thinking else "primary"
+
+
+class ComplexityRouter:
+    """Scores queries locally and only sends the ones that need it to the thinking LLM.
+
+    The score is a weighted average of three features in [0, 1]: query length, flatness of the retrieval score
+    distribution (relevant information spread thinly over many documents), and an optional nearest-centroid
+    classifier trained on simple vs complex example queries.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        vector_store: VectorStore,
+        searcher: AsyncQdrantSearcher | None,
+        config: dict,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            embedding (Embeddings): The embedding model shared with the RAG pipeline.
+            vector_store (VectorStore): The vector store used to probe retrieval scores.
+            searcher (AsyncQdrantSearcher | None): Async searcher used to probe by vector when available.
+            config (dict): The `routing` section of the configuration.
+
+        Raises:
+            ValueError: If the routing examples do not include both the 'simple' and 'complex' labels.
+        """
+        self.embedding = embedding
+        self.vector_store = vector_store
+        self.searcher = searcher
+        self.threshold = config["threshold"]
+        self.weights = config["weights"]
+        self.length_words = config["length_words"]
+        self.spread_scale = config["spread_scale"]
+        self.probe_k = config["probe_k"]
+        self.temperature = config.get("temperature", 0.02)
+
+        self.classifier = None
+        if config.get("examples"):
+            with open(config["examples"]) as file:
+                examples = yaml.safe_load(file)
+            missing = {"simple", "complex"} - set(examples or {})
+            if missing:
+                raise ValueError(
+                    f"Routing examples in '{config['examples']}' are missing labels: {', '.join(sorted(missing))}."
+                )
+            self.classifier = CentroidClassifier(embedding, examples)
+
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(float)
+
+    async def _probe_scores(self, query: str, vector: list[float]) -> list[float]:
+        """Get the retrieval scores of the top documents for the raw query."""
+        if self.searcher is not None:
+            results = await self.searcher.search_by_vector(vector, k=self.probe_k)
+        else:
+            results = await self.vector_store.asimilarity_search_with_score(query, k=self.probe_k)
+        return sorted((score for _, score in results), reverse=True)
+
+    async def route(self, query: str) -> RoutingDecision:
+        """Decide whether a query should be answered by the thinking LLM.
+
+        Args:
+            query (str): The user's query.
+
+        Returns:
+            RoutingDecision: The routing decision with its score and features.
+        """
+        vector = await self.embedding.aembed_query(query)
+        scores = await self._probe_scores(query, vector)
+
+        features = {"length": min(len(query.split()) / self.length_words, 1.0)}
+        if len(scores) > 1:
+            # A clear winner among the documents suggests a simple lookup; a flat distribution suggests synthesis
+            gap = scores[0] - sum(scores[1:]) / (len(scores) - 1)
+            features["spread"] = 1.0 - min(gap / self.spread_scale, 1.0)
+        if self.classifier is not None:
+            similarity = self.classifier.scores(vector)
+            features["classifier"] = 1 / (
+                1 + math.exp(-(similarity["complex"] - similarity["simple"]) / self.temperature)
+            )
+
+        total_weight = sum(self.weights[name] for name in features)
+        score = sum(self.weights[name] * value for name, value in features.items()) / total_weight
+        decision = RoutingDecision(thinking=score >= self.threshold, score=score, features=features)
+        logging.debug(f"Routed query to {decision.route} (score {score:.3f}, features {features}).")
+        return decision
+
+    def record(self, route: str, latency: float) -> None:
+        """Record the latency of a request answered on a route.
+
+        Args:
+            route (str): The LLM the request was answered by.
+            latency (float): Time taken to answer the request in seconds.
+        """
+        self.requests[route] += 1
+        self.latency[route] += latency
+
+    def snapshot(self) -> dict:
+        """Get per-route request counts and average latency, and the number of thinking LLM calls avoided."""
+        return {
+            **{
+                route: {"requests": count, "avg_latency": round(self.latency[route] / count, 3)}
+                for route, count in self.requests.items()
+            },
+            "thinking_calls_avoided": self.requests.get("primary", 0),
+        }
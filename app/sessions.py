@@ -0,0 +1,155 @@
+"""Bounded, TTL-evicted in-memory store of server-side conversation sessions."""
+
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+
+class SessionNotFoundError(KeyError):
+    """Raised when a session id is unknown or its session has expired."""
+
+
+@dataclass
+class Session:
+    """A conversation kept on the server, holding its chat history as ready-to-use LangChain messages.
+
+    Each turn is stored with the standalone question its query was rewritten to rather than the raw query, so
+    earlier turns never need to be resolved again and only the most recent ones are needed to rewrite the next.
+    """
+
+    id: str
+    messages: list[BaseMessage] = field(default_factory=list)
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class RewriteCapture(BaseCallbackHandler):
+    """Callback handler that captures the standalone question produced by the rewrite stage of a request."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        """Initialize the handler with no captured question."""
+        self.question: str | None = None
+        self._run_ids: set[UUID] = set()
+
+    def on_chain_start(
+        self, serialized: dict[str, Any], inputs: dict[str, Any], *, run_id: UUID, **kwargs: object
+    ) -> None:
+        """Track runs of the rewrite stage."""
+        if kwargs.get("name") == "rewrite":
+            self._run_ids.add(run_id)
+
+    def on_chain_end(self, outputs: dict[str, Any], *, run_id: UUID, **kwargs: object) -> None:
+        """Capture the output of the rewrite stage."""
+        if run_id in self._run_ids and isinstance(outputs, str):
+            self.question = outputs.strip()
+
+
+class SessionStore:
+    """Keeps the most recently used sessions, evicting idle ones after a TTL and the oldest ones when full."""
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_turns: int, rewrite_turns: int) -> None:
+        """Initialize the session store.
+
+        Args:
+            max_sessions (int): Maximum number of sessions kept at once.
+            ttl_seconds (float): Idle time after which a session expires.
+            max_turns (int): Maximum number of question-answer turns kept per session.
+            rewrite_turns (int): Number of most recent turns given to the rewrite stage.
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.rewrite_turns = rewrite_turns
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _expire(self) -> None:
+        """Drop sessions that have been idle for longer than the TTL."""
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            del self._sessions[session.id]
+            self.expired += 1
+
+    def create(self, messages: list[BaseMessage]) -> Session:
+        """Start a new session seeded with existing chat history.
+
+        Args:
+            messages (list[BaseMessage]): The chat history to seed the session with.
+
+        Returns:
+            Session: The new session.
+        """
+        self._expire()
+        if len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+            logging.debug("Session store full, evicted the least recently used session.")
+
+        session = Session(id=uuid.uuid4().hex, messages=messages[-2 * self.max_turns :])
+        self._sessions[session.id] = session
+        self.created += 1
+        return session
+
+    def get(self, session_id: str) -> Session:
+        """Look up a session and mark it as recently used.
+
+        Args:
+            session_id (str): The session id returned by a previous request.
+
+        Returns:
+            Session: The session.
+
+        Raises:
+            SessionNotFoundError: If the session is unknown or has expired.
+        """
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(session_id)
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def append(self, session: Session, question: str, answer: str) -> None:
+        """Add a question-answer turn to a session, dropping the oldest turns beyond the limit.
+
+        Args:
+            session (Session): The session to update.
+            question (str): The standalone question the user's query was rewritten to, or the query itself.
+            answer (str): The generated answer.
+        """
+        session.messages = [*session.messages, HumanMessage(question), AIMessage(answer)][-2 * self.max_turns :]
+
+    def rewrite_history(self, session: Session) -> list[BaseMessage]:
+        """Get the chat history given to the rewrite stage for the next query of a session.
+
+        Args:
+            session (Session): The session.
+
+        Returns:
+            list[BaseMessage]: The most recent turns of the session.
+        """
+        return session.messages[-2 * self.rewrite_turns :]
+
+    def snapshot(self) -> dict:
+        """Get current counters."""
+        return {
+            "active": len(self._sessions),
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
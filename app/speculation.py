@@ -0,0 +1,53 @@
+"""Bookkeeping for speculative retrieval in the RAG pipeline."""
+
+import logging
+from dataclasses import dataclass
+
+
+@dataclass
+class SpeculationStats:
+    """Tracks how often speculative retrieval pays off and how much latency it saves."""
+
+    attempts: int = 0
+    hits: int = 0
+    saved_seconds: float = 0.0
+    wasted_seconds: float = 0.0
+    wasted_llm_calls: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of speculative attempts whose retrieval was reused."""
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    def record(self, hit: bool, seconds: float, wasted_llm_calls: int = 0) -> None:
+        """Record the outcome of a speculative attempt.
+
+        Args:
+            hit (bool): Whether the speculative retrieval was reused.
+            seconds (float): Latency saved on a hit, or retrieval time thrown away on a miss.
+            wasted_llm_calls (int): Number of LLM calls made by the discarded retrieval on a miss.
+        """
+        self.attempts += 1
+        if hit:
+            self.hits += 1
+            self.saved_seconds += seconds
+        else:
+            self.wasted_seconds += seconds
+            self.wasted_llm_calls += wasted_llm_calls
+        logging.info(
+            f"Speculation {'hit' if hit else 'miss'} ({seconds:.3f}s). "
+            f"Hit rate: {self.hits}/{self.attempts} ({self.hit_rate:.1%}), "
+            f"total saved: {self.saved_seconds:.3f}s, total wasted: {self.wasted_seconds:.3f}s "
+            f"and {self.wasted_llm_calls} LLM calls"
+        )
+
+    def snapshot(self) -> dict:
+        """Get current counters."""
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": round(self.hit_rate, 4),
+            "saved_seconds": round(self.saved_seconds, 3),
+            "wasted_seconds": round(self.wasted_seconds, 3),
+            "wasted_llm_calls": self.wasted_llm_calls,
+        }
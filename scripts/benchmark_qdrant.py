@@ -0,0 +1,118 @@
+"""Benchmark REST vs gRPC Qdrant transports at increasing concurrency against a local Qdrant instance.
+
+Start a local Qdrant first, e.g. `docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant`, then run
+`python scripts/benchmark_qdrant.py`. Pass `--in-memory` to benchmark the in-process local mode instead.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, models
+
+from app.qdrant_transport import AsyncQdrantSearcher, build_async_qdrant_client
+
+
+async def populate(client: AsyncQdrantClient, collection_name: str, points: int, dim: int) -> None:
+    """Create a collection filled with random unit vectors."""
+    await client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+    )
+    rng = np.random.default_rng(0)
+    for start in range(0, points, 1000):
+        vectors = rng.standard_normal((min(1000, points - start), dim), dtype=np.float32)
+        await client.upsert(
+            collection_name=collection_name,
+            points=[
+                models.PointStruct(
+                    id=start + i,
+                    vector=vector.tolist(),
+                    payload={"page_content": f"doc {start + i}", "metadata": {"url": f"https://example.com/{i}"}},
+                )
+                for i, vector in enumerate(vectors)
+            ],
+        )
+
+
+async def run_load(searcher: AsyncQdrantSearcher, queries: np.ndarray, concurrency: int, k: int) -> dict:
+    """Issue all queries with at most `concurrency` in flight and collect latency statistics."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def search(vector: np.ndarray) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await searcher.search_by_vector(vector.tolist(), k=k)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(search(vector) for vector in queries))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": len(queries) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main() -> None:
+    """Run the benchmark for each transport and concurrency level and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark REST vs gRPC Qdrant transports.")
+    parser.add_argument("--url", type=str, default="http://localhost:6333", help="Local Qdrant REST URL.")
+    parser.add_argument("--grpc-port", type=int, default=6334, help="Local Qdrant gRPC port.")
+    parser.add_argument("--in-memory", action="store_true", help="Benchmark the in-process local mode instead.")
+    parser.add_argument("--points", type=int, default=10_000, help="Number of points in the collection.")
+    parser.add_argument("--dim", type=int, default=768, help="Vector dimension (gte-modernbert-base is 768).")
+    parser.add_argument("--requests", type=int, default=500, help="Number of searches per run.")
+    parser.add_argument("--k", type=int, default=20, help="Number of results per search.")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrency levels to benchmark."
+    )
+    parser.add_argument("--pool-size", type=int, default=32, help="HTTP connection pool size.")
+    args = parser.parse_args()
+
+    base_config = {
+        "grpc_port": args.grpc_port,
+        "pool_size": args.pool_size,
+        "keepalive_seconds": 30,
+        "timeout_seconds": 30,
+    }
+    transports = {"memory": None} if args.in_memory else {"rest": False, "grpc": True}
+
+    collection_name = f"transport-benchmark-{uuid.uuid4().hex[:8]}"
+    queries = np.random.default_rng(1).standard_normal((args.requests, args.dim), dtype=np.float32)
+
+    print(f"{'transport':<10}{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for transport, prefer_grpc in transports.items():
+        client = build_async_qdrant_client(
+            url=args.url,
+            api_key=None,
+            config={**base_config, "prefer_grpc": bool(prefer_grpc)},
+            in_memory=args.in_memory,
+        )
+        if args.in_memory or transport == "rest":
+            await populate(client, collection_name, args.points, args.dim)
+        searcher = AsyncQdrantSearcher(client=client, collection_name=collection_name, timeout_seconds=30)
+
+        # Warm up connections before measuring
+        await run_load(searcher, queries[: max(args.concurrency)], max(args.concurrency), args.k)
+        for concurrency in args.concurrency:
+            stats = await run_load(searcher, queries, concurrency, args.k)
+            print(
+                f"{transport:<10}{concurrency:>12}{stats['throughput']:>10.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+            )
+
+        if transport == list(transports)[-1]:
+            await client.delete_collection(collection_name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Replay recorded /ask traffic against a running server.
+
+To warm up a new server before a cutover, enable `warmup` in its configuration instead, so that the warm-up runs
+in the serving process.
+
+Example:
+    Replay at twice the recorded rate against a local server:
+    `python scripts/replay_traffic.py logs/traffic/*.jsonl.gz --target http://localhost:7860 --speed 2`
+"""
+
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from app.recorder import load_records
+
+
+def build_payload(record: dict, synthetic_history: bool) -> dict:
+    """Build an /ask request body from a recorded request."""
+    payload = {"query": record["query"], "thinking": record["thinking"]}
+    if synthetic_history:
+        # Only the history length is recorded, so placeholder turns reproduce the payload shape
+        payload["history"] = [
+            {"query": f"Previous question {i}", "answer": f"Previous answer {i}"}
+            for i in range(record["history_length"])
+        ]
+    return payload
+
+
+async def replay_http(records: list[dict], target: str, speed: float, synthetic_history: bool, timeout: float) -> None:
+    """Send the recorded requests to a running server, preserving their relative timing scaled by `speed`."""
+    start_time = datetime.datetime.fromisoformat(records[0]["timestamp"])
+    statuses = Counter()
+    latencies = []
+
+    async with httpx.AsyncClient(base_url=target, timeout=timeout) as client:
+
+        async def send(record: dict) -> None:
+            if speed > 0:
+                offset = (datetime.datetime.fromisoformat(record["timestamp"]) - start_time).total_seconds()
+                await asyncio.sleep(offset / speed)
+            request_start = time.perf_counter()
+            try:
+                response = await client.post("/ask", json=build_payload(record, synthetic_history))
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - request_start)
+
+        replay_start = time.perf_counter()
+        await asyncio.gather(*(send(record) for record in records))
+        elapsed = time.perf_counter() - replay_start
+
+    latencies.sort()
+    print(f"Replayed {len(records)} requests in {elapsed:.1f}s")
+    print(f"Status codes: {dict(statuses)}")
+    print(
+        f"Latency p50: {statistics.median(latencies):.3f}s, "
+        f"p95: {latencies[max(int(len(latencies) * 0.95) - 1, 0)]:.3f}s, max: {latencies[-1]:.3f}s"
+    )
+
+
+def main() -> None:
+    """Parse command line arguments and replay."""
+    parser = argparse.ArgumentParser(description="Replay recorded /ask traffic.")
+    parser.add_argument("logs", nargs="+", help="Recorded traffic logs (.jsonl.gz).")
+    parser.add_argument("--target", type=str, default="http://localhost:7860", help="Base URL of the server.")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay rate relative to the recording, e.g. 2 for twice as fast. 0 sends everything at once.",
+    )
+    parser.add_argument(
+        "--synthetic-history", action="store_true", help="Send placeholder history of the recorded length."
+    )
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout in seconds.")
+    args = parser.parse_args()
+
+    records = load_records(args.logs)
+    if not records:
+        print("No records found.")
+        return
+
+    asyncio.run(replay_http(records, args.target, args.speed, args.synthetic_history, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
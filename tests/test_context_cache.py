@@ -0,0 +1,132 @@
+"""Tests for the provider-side prompt cache, using a fake context cache provider."""
+
+import asyncio
+
+import pytest
+
+from app import context_cache
+from app.context_cache import PromptCache
+
+
+class FakeProvider:
+    """Context cache provider that records calls and fails on demand."""
+
+    def __init__(self) -> None:
+        """Initialize the fake provider."""
+        self.created = 0
+        self.refreshed = []
+        self.fail_create = False
+        self.fail_refresh = False
+
+    def create(self, model: str, system_instruction: str, ttl_seconds: int) -> str:
+        """Create a fake cache, or fail if configured to."""
+        if self.fail_create:
+            raise RuntimeError("create failed")
+        self.created += 1
+        return f"cachedContents/{model}-{self.created}"
+
+    def refresh(self, name: str, ttl_seconds: int) -> None:
+        """Refresh a fake cache, or fail if configured to."""
+        if self.fail_refresh:
+            raise RuntimeError("refresh failed")
+        self.refreshed.append(name)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the clock used by the prompt cache."""
+    fake_clock = FakeClock()
+    monkeypatch.setattr(context_cache.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def provider() -> FakeProvider:
+    """Create a fake provider."""
+    return FakeProvider()
+
+
+@pytest.fixture
+def cache(provider: FakeProvider) -> PromptCache:
+    """Create a prompt cache with a 100s TTL, a 10s refresh margin and a 30s retry backoff."""
+    return PromptCache(provider, ttl_seconds=100, refresh_margin_seconds=10, retry_seconds=30)
+
+
+def test_create_failure_falls_back_and_backs_off(clock: FakeClock, provider: FakeProvider, cache: PromptCache) -> None:
+    """A failed create serves uncached prompts and is only retried after the backoff."""
+    provider.fail_create = True
+    cache.register("answer", "model", "instructions")
+    assert asyncio.run(cache.aget("answer")) is None
+    assert cache.failures == 1
+
+    provider.fail_create = False
+    clock.now = 29
+    assert asyncio.run(cache.aget("answer")) is None
+    assert provider.created == 0
+
+    clock.now = 30
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-1"
+    assert cache.snapshot()["misses"] == 2
+
+
+def test_refresh_only_within_margin(clock: FakeClock, provider: FakeProvider, cache: PromptCache) -> None:
+    """A cache is refreshed once its remaining lifetime drops below the refresh margin."""
+    cache.register("answer", "model", "instructions")
+
+    clock.now = 85
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-1"
+    assert provider.refreshed == []
+
+    clock.now = 95
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-1"
+    assert provider.refreshed == ["cachedContents/model-1"]
+
+    clock.now = 180
+    asyncio.run(cache.aget("answer"))
+    assert provider.refreshed == ["cachedContents/model-1"]
+
+
+def test_refresh_failure_backs_off(clock: FakeClock, provider: FakeProvider, cache: PromptCache) -> None:
+    """A failed refresh keeps serving the live cache without retrying until the backoff has passed."""
+    cache.register("answer", "model", "instructions")
+    provider.fail_refresh = True
+
+    clock.now = 95
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-1"
+    assert cache.failures == 1
+
+    provider.fail_refresh = False
+    clock.now = 99
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-1"
+    assert provider.refreshed == []
+
+    # The cache expired during the backoff, so uncached prompts are used until it can be recreated
+    clock.now = 110
+    assert asyncio.run(cache.aget("answer")) is None
+
+    clock.now = 125
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-2"
+
+
+def test_invalidate_recreates_cache(clock: FakeClock, provider: FakeProvider, cache: PromptCache) -> None:
+    """A cache rejected by the provider is recreated on next use, but a newer cache is not invalidated."""
+    cache.register("answer", "model", "instructions")
+
+    cache.invalidate("answer", "cachedContents/model-1")
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-2"
+
+    cache.invalidate("answer", "cachedContents/model-1")
+    assert asyncio.run(cache.aget("answer")) == "cachedContents/model-2"
+    assert cache.snapshot()["invalidations"] == 1
@@ -0,0 +1,33 @@
+"""Tests for picking the retrieval depth from the score distribution."""
+
+from app.retrieval import select_k
+
+
+def test_one_strong_hit_keeps_min_k() -> None:
+    """A single strong hit over a flat tail keeps only the minimum number of documents."""
+    assert select_k([0.9, 0.5, 0.49, 0.48], min_k=2, max_k=8, min_gap=0.05) == 2
+    assert select_k([0.9, 0.5, 0.49, 0.48, 0.47, 0.46, 0.45, 0.44, 0.43, 0.42], min_k=2, max_k=8, min_gap=0.05) == 2
+    assert select_k([0.9, 0.5, 0.49, 0.48], min_k=1, max_k=8, min_gap=0.05) == 1
+
+
+def test_clear_elbow() -> None:
+    """The cut is placed at the largest drop in the scores."""
+    assert select_k([0.9, 0.88, 0.86, 0.85, 0.6, 0.58, 0.57], min_k=2, max_k=8, min_gap=0.05) == 4
+
+
+def test_elbow_beyond_max_k_is_ignored() -> None:
+    """Drops below the top `max_k` documents do not count."""
+    assert select_k([0.9, 0.89, 0.88, 0.87, 0.5], min_k=2, max_k=3, min_gap=0.05) == 3
+
+
+def test_flat_scores_keep_max_k() -> None:
+    """Without any drop of at least `min_gap`, up to `max_k` documents are kept."""
+    assert select_k([0.8, 0.79, 0.78, 0.77, 0.76, 0.75, 0.74, 0.73, 0.72, 0.71], min_k=2, max_k=8, min_gap=0.05) == 8
+    assert select_k([0.8, 0.79, 0.78], min_k=2, max_k=8, min_gap=0.05) == 3
+
+
+def test_empty_and_short() -> None:
+    """Fewer candidates than `min_k` are all kept, and no candidates keep nothing."""
+    assert select_k([], min_k=2, max_k=8, min_gap=0.05) == 0
+    assert select_k([0.9], min_k=2, max_k=8, min_gap=0.05) == 1
+    assert select_k([0.9, 0.3], min_k=2, max_k=8, min_gap=0.05) == 2